@@ -0,0 +1,167 @@
+"""
+Fingerprinted, precompressed static assets.
+
+``python -m app.assets`` copies every file under ``static/`` to
+``static/dist/`` with a content hash in its name (``js/app.js`` ->
+``dist/js/app.1a2b3c4d5e6f.js``), writes ``.gz`` and ``.br`` siblings where
+they are smaller, and records the mapping in ``static/dist/manifest.json``.
+
+Templates link assets through ``asset_url("js/app.js")``, which resolves to the
+fingerprinted URL when a manifest exists and to the plain path otherwise, so
+development works without a build. Because a fingerprinted URL never changes
+content, ``PrecompressedStaticFiles`` serves it with a one-year immutable
+Cache-Control and picks the precompressed variant from Accept-Encoding.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from functools import lru_cache
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import brotli
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+STATIC_DIR = Path("static")
+BUILD_DIRNAME = "dist"
+MANIFEST_NAME = "manifest.json"
+STATIC_URL_PREFIX = "/static/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Preferred first; suffix of the precompressed sibling file
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Already-compressed formats gain nothing from another pass
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".html", ".svg", ".json", ".txt", ".map", ".xml"}
+HASH_LENGTH = 12
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    """``app.js`` -> ``app.<first 12 hex of sha256>.js``"""
+    stem, dot, suffix = name.rpartition(".")
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def _compressed_variants(content: bytes) -> Dict[str, bytes]:
+    return {
+        # mtime=0 keeps the output reproducible between builds
+        ".gz": gzip.compress(content, compresslevel=9, mtime=0),
+        ".br": brotli.compress(content, quality=11),
+    }
+
+
+def build(static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    """Rebuild ``<static_dir>/dist`` and return the manifest (source path -> built path)."""
+    static_dir = Path(static_dir)
+    out_dir = static_dir / BUILD_DIRNAME
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+
+    manifest = {}
+    for source in sorted(p for p in static_dir.rglob("*") if p.is_file()):
+        relative = source.relative_to(static_dir)
+        if relative.parts[0] == BUILD_DIRNAME:
+            continue
+        content = source.read_bytes()
+        built = Path(BUILD_DIRNAME, *relative.parts[:-1], fingerprint(relative.name, content))
+        target = static_dir / built
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        if source.suffix in COMPRESSIBLE_SUFFIXES:
+            for suffix, compressed in _compressed_variants(content).items():
+                if len(compressed) < len(content):
+                    target.with_name(target.name + suffix).write_bytes(compressed)
+        manifest[relative.as_posix()] = built.as_posix()
+
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+
+@lru_cache(maxsize=None)
+def load_manifest() -> Dict[str, str]:
+    """The built manifest, read once per process; empty when assets were not built."""
+    try:
+        return json.loads((STATIC_DIR / BUILD_DIRNAME / MANIFEST_NAME).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(path: str) -> str:
+    """URL for a file under static/, fingerprinted when the assets have been built."""
+    return STATIC_URL_PREFIX + load_manifest().get(path, path)
+
+
+def accepted_encodings(accept_encoding: str, supported: Iterable[str] = tuple(dict(ENCODINGS))) -> List[str]:
+    """Encodings from ``supported`` the client accepts (q > 0), in the order of ``supported``."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    return [name for name in supported if name in accepted or "*" in accepted]
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves files under ``dist/`` with immutable caching and,
+    when the client accepts it, the prebuilt ``.br``/``.gz`` sibling with the
+    matching Content-Encoding. Everything else is served as plain StaticFiles.
+    """
+
+    def __init__(self, *, directory, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.build_dir = os.path.realpath(os.path.join(directory, BUILD_DIRNAME)) + os.sep
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        if not os.path.realpath(full_path).startswith(self.build_dir):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        suffixes = dict(ENCODINGS)
+        for encoding in accepted_encodings(request_headers.get("accept-encoding", ""), suffixes):
+            variant = f"{full_path}{suffixes[encoding]}"
+            try:
+                variant_stat = os.stat(variant)
+            except FileNotFoundError:
+                continue
+            full_path, stat_result = variant, variant_stat
+            headers["Content-Encoding"] = encoding
+            break
+
+        response = FileResponse(
+            full_path, status_code=status_code, headers=headers, media_type=media_type,
+            stat_result=stat_result, method=scope["method"],
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets")
+    parser.add_argument("--static-dir", default=str(STATIC_DIR),
+                        help="directory to build from; output goes to <dir>/dist (default: %(default)s)")
+    args = parser.parse_args(argv)
+    manifest = build(Path(args.static_dir))
+    for source, built in manifest.items():
+        print(f"{source} -> {built}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
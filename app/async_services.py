@@ -0,0 +1,500 @@
+"""
+Async variants of the functions in app.services.
+
+These run against an AsyncSession so the async route handlers never block the
+event loop on database I/O. Signatures and behaviour mirror app.services.
+"""
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from app import models, schemas
+from app.events import publish_change
+from app.hashing import password_hash_pool
+from app.pagination import encode_cursor, decode_cursor
+from app.versioning import bump_todo_list_version, todo_list_version_query
+from app.search import search_todos_query
+from app.config import TODO_EXPORT_BATCH_SIZE, TODO_IMPORT_CHUNK_SIZE, TODO_IMPORT_MAX_LINE_BYTES
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> models.User:
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    # Check if username already exists
+    if await get_user_by_username(db, user.username):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        )
+
+    # Check if email already exists
+    result = await db.execute(select(models.User).where(models.User.email == user.email))
+    if result.scalars().first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
+    hashed_password = await password_hash_pool.hash(user.password)
+    db_user = models.User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> models.User:
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    if not await password_hash_pool.verify(password, user.hashed_password):
+        return None
+    return user
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> models.User:
+    return await db.get(models.User, user_id)
+
+
+def todo_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Todo not found"
+    )
+
+
+# Mutations below are single owner-scoped statements with RETURNING (SQLite
+# >= 3.35, PostgreSQL) and return column rows like the read paths, instead of
+# SELECT + write + refresh on an ORM instance.
+
+async def insert_todo_row(db: AsyncSession, values: dict, owner_id: int):
+    result = await db.execute(
+        insert(models.Todo).values(**values, owner_id=owner_id).returning(*models.TODO_COLUMNS)
+    )
+    return result.one()
+
+
+async def update_todo_row(db: AsyncSession, todo_id: int, values: dict, owner_id: int):
+    """Apply ``values`` to one owned todo; the updated row, or None if nothing matched."""
+    result = await db.execute(
+        update(models.Todo).where(
+            models.Todo.id == todo_id,
+            models.Todo.owner_id == owner_id
+        ).values(**values).returning(*models.TODO_COLUMNS).execution_options(synchronize_session=False)
+    )
+    return result.first()
+
+
+async def delete_todo_row(db: AsyncSession, todo_id: int, owner_id: int) -> bool:
+    result = await db.execute(
+        delete(models.Todo).where(
+            models.Todo.id == todo_id,
+            models.Todo.owner_id == owner_id
+        ).returning(models.Todo.id).execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
+
+
+async def create_todo(db: AsyncSession, todo: schemas.TodoCreate, owner_id: int):
+    created = await insert_todo_row(db, todo.model_dump(), owner_id)
+    await db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
+    await db.commit()
+    publish_change("created", owner_id, created)
+    return created
+
+
+async def get_todo_list_version(db: AsyncSession, owner_id: int) -> int:
+    result = await db.execute(todo_list_version_query(owner_id))
+    return result.scalar() or 0
+
+
+# Sort keys for the todo list. updated_at is NULL until the first edit, so
+# "updated_at" sorts by last modification, falling back to creation time.
+SORT_KEYS = {
+    "created_at": models.Todo.created_at,
+    "updated_at": models.modified_at,
+    "title": models.Todo.title,
+}
+
+
+def _todos_query(owner_id: int, completed: Optional[bool], as_rows: bool = False):
+    query = select(*models.TODO_COLUMNS) if as_rows else select(models.Todo)
+    query = query.where(models.Todo.owner_id == owner_id)
+    if completed is not None:
+        query = query.where(models.Todo.completed == completed)
+    return query
+
+
+def _order_by(sort: str, direction: str):
+    key = SORT_KEYS[sort]
+    if direction == "desc":
+        return key.desc(), models.Todo.id.desc()
+    return key, models.Todo.id
+
+
+def _sort_value(todo, sort: str):
+    if sort == "updated_at":
+        return todo.updated_at or todo.created_at
+    return getattr(todo, sort)
+
+
+async def get_todos(
+    db: AsyncSession,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    completed: Optional[bool] = None,
+    sort: str = "created_at",
+    direction: str = "asc",
+    as_rows: bool = False,
+):
+    """
+    Offset page of todos. ``as_rows=True`` returns plain column rows (see
+    models.TODO_COLUMNS) instead of ORM instances, for callers that only serialize.
+    """
+    result = await db.execute(
+        _todos_query(owner_id, completed, as_rows).order_by(*_order_by(sort, direction)).offset(skip).limit(limit)
+    )
+    return result.all() if as_rows else result.scalars().all()
+
+
+async def get_todos_page(
+    db: AsyncSession,
+    owner_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    sort: str = "created_at",
+    direction: str = "asc",
+    as_rows: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """Keyset page of todos ordered by (sort key, id), plus the cursor for the next page."""
+    query = _todos_query(owner_id, completed, as_rows)
+    if cursor:
+        after_value, after_id = decode_cursor(cursor, sort, direction)
+        key = SORT_KEYS[sort]
+        # Bind with the key's type so SQLite compares in its storage format
+        row, after = tuple_(key, models.Todo.id), tuple_(literal(after_value, key.type), literal(after_id))
+        query = query.where(row < after if direction == "desc" else row > after)
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(
+        query.order_by(*_order_by(sort, direction)).limit(limit + 1)
+    )
+    todos = result.all() if as_rows else result.scalars().all()
+    if len(todos) <= limit or limit <= 0:
+        return todos[:max(limit, 0)], None
+    todos = todos[:limit]
+    last = todos[-1]
+    return todos, encode_cursor(sort, direction, _sort_value(last, sort), last.id)
+
+
+async def get_todo_stats(db: AsyncSession, owner_id: int) -> schemas.TodoStats:
+    result = await db.execute(
+        select(models.Todo.completed, func.count()).where(
+            models.Todo.owner_id == owner_id
+        ).group_by(models.Todo.completed)
+    )
+    counts = {bool(completed): count for completed, count in result.all()}
+    completed, active = counts.get(True, 0), counts.get(False, 0)
+    return schemas.TodoStats(total=completed + active, completed=completed, active=active)
+
+
+async def search_todos(
+    db: AsyncSession, owner_id: int, q: str, limit: int = 20, offset: int = 0, as_rows: bool = False
+):
+    if not q.split():
+        return []
+    result = await db.execute(
+        search_todos_query(db.bind.dialect.name, owner_id, q, limit, offset, as_rows=as_rows)
+    )
+    return result.all() if as_rows else result.scalars().all()
+
+
+async def get_todo_by_id(db: AsyncSession, todo_id: int, owner_id: int) -> models.Todo:
+    result = await db.execute(
+        select(models.Todo).where(
+            models.Todo.id == todo_id,
+            models.Todo.owner_id == owner_id
+        )
+    )
+    todo = result.scalars().first()
+    if not todo:
+        raise todo_not_found()
+    return todo
+
+
+async def get_todo_row(db: AsyncSession, todo_id: int, owner_id: int):
+    """Read-only variant of get_todo_by_id returning a column row instead of an ORM instance."""
+    result = await db.execute(
+        select(*models.TODO_COLUMNS).where(
+            models.Todo.id == todo_id,
+            models.Todo.owner_id == owner_id
+        )
+    )
+    todo = result.first()
+    if not todo:
+        raise todo_not_found()
+    return todo
+
+
+async def get_todo_row_with_version(db: AsyncSession, todo_id: int, owner_id: int):
+    """get_todo_row plus the owner's list version, in one statement, for revalidating the todo."""
+    version = todo_list_version_query(owner_id).scalar_subquery().label("list_version")
+    result = await db.execute(
+        select(*models.TODO_COLUMNS, version).where(
+            models.Todo.id == todo_id,
+            models.Todo.owner_id == owner_id
+        )
+    )
+    todo = result.first()
+    if not todo:
+        raise todo_not_found()
+    return todo, todo.list_version or 0
+
+
+async def update_todo(db: AsyncSession, todo_id: int, todo_update: schemas.TodoUpdate, owner_id: int):
+    update_data = todo_update.model_dump(exclude_unset=True)
+    if not update_data:
+        # Nothing to change: leave updated_at and the list version alone
+        return await get_todo_row(db, todo_id, owner_id)
+    updated = await update_todo_row(db, todo_id, update_data, owner_id)
+    if updated is None:
+        await db.rollback()
+        raise todo_not_found()
+    await db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
+    await db.commit()
+    publish_change("updated", owner_id, updated)
+    return updated
+
+
+async def delete_todo(db: AsyncSession, todo_id: int, owner_id: int):
+    if not await delete_todo_row(db, todo_id, owner_id):
+        await db.rollback()
+        raise todo_not_found()
+    await db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
+    await db.commit()
+    publish_change("deleted", owner_id, todo_id=todo_id)
+    return {"message": "Todo deleted successfully"}
+
+
+async def batch_todos(db: AsyncSession, batch: schemas.TodoBatchRequest, owner_id: int) -> schemas.TodoBatchResponse:
+    """
+    Apply creates, updates and deletes in one transaction.
+
+    Ownership of every referenced id is checked with a single query; ids the
+    user does not own are reported as 404 and skipped, updates that would null
+    a required column as 422, and the rest are applied with one bulk statement
+    per operation type. An owned id named more than once across updates and
+    deletes is ambiguous, so every occurrence is rejected with 422 and the row
+    is left untouched. A database error rolls the whole batch back.
+    """
+    invalid = {
+        position: f"{field} may not be null"
+        for position, item in enumerate(batch.update)
+        for field in ("title", "completed")
+        if field in item.model_fields_set and getattr(item, field) is None
+    }
+    mentions = Counter([item.id for item in batch.update] + batch.delete)
+    conflicting = {todo_id for todo_id, count in mentions.items() if count > 1}
+    referenced = set(mentions)
+    owned = set()
+    created = []
+    try:
+        if referenced:
+            result = await db.execute(
+                select(models.Todo.id).where(
+                    models.Todo.owner_id == owner_id,
+                    models.Todo.id.in_(referenced)
+                )
+            )
+            owned = set(result.scalars().all())
+
+        if batch.create:
+            result = await db.scalars(
+                insert(models.Todo).returning(models.Todo, sort_by_parameter_order=True),
+                [{**todo.model_dump(), "owner_id": owner_id} for todo in batch.create]
+            )
+            created = result.all()
+
+        updates = [
+            item for position, item in enumerate(batch.update)
+            if item.id in owned and item.id not in conflicting and position not in invalid
+        ]
+        if updates:
+            await db.execute(
+                update(models.Todo),
+                [
+                    {"id": item.id, **item.model_dump(exclude_unset=True, exclude={"id"})}
+                    for item in updates
+                ]
+            )
+
+        deletes = [todo_id for todo_id in batch.delete if todo_id in owned and todo_id not in conflicting]
+        if deletes:
+            await db.execute(
+                delete(models.Todo).where(
+                    models.Todo.owner_id == owner_id,
+                    models.Todo.id.in_(deletes)
+                )
+            )
+
+        if created or updates or deletes:
+            await db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+    updated = {}
+    if updates:
+        result = await db.execute(
+            select(models.Todo).where(
+                models.Todo.id.in_({item.id for item in updates})
+            ).execution_options(populate_existing=True)
+        )
+        updated = {todo.id: todo for todo in result.scalars().all()}
+
+    not_found = "Todo not found"
+    duplicate = "Todo id appears more than once in the batch"
+    results = [
+        schemas.TodoBatchItemResult(
+            op="create", id=todo.id, status=status.HTTP_200_OK,
+            todo=schemas.TodoResponse.model_validate(todo)
+        )
+        for todo in created
+    ]
+    for position, item in enumerate(batch.update):
+        if item.id not in owned:
+            results.append(schemas.TodoBatchItemResult(
+                op="update", id=item.id, status=status.HTTP_404_NOT_FOUND, detail=not_found
+            ))
+            continue
+        if item.id in conflicting:
+            results.append(schemas.TodoBatchItemResult(
+                op="update", id=item.id, status=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=duplicate
+            ))
+            continue
+        if position in invalid:
+            results.append(schemas.TodoBatchItemResult(
+                op="update", id=item.id, status=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=invalid[position]
+            ))
+            continue
+        results.append(schemas.TodoBatchItemResult(
+            op="update", id=item.id, status=status.HTTP_200_OK,
+            todo=schemas.TodoResponse.model_validate(updated[item.id])
+        ))
+    for todo_id in batch.delete:
+        if todo_id not in owned:
+            results.append(schemas.TodoBatchItemResult(
+                op="delete", id=todo_id, status=status.HTTP_404_NOT_FOUND, detail=not_found
+            ))
+        elif todo_id in conflicting:
+            results.append(schemas.TodoBatchItemResult(
+                op="delete", id=todo_id, status=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=duplicate
+            ))
+        else:
+            results.append(schemas.TodoBatchItemResult(op="delete", id=todo_id, status=status.HTTP_200_OK))
+    if created or updates or deletes:
+        # Too many items to replay one by one; streams reload the list instead
+        publish_change("resync", owner_id)
+    return schemas.TodoBatchResponse(results=results)
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def export_todos(db: AsyncSession, owner_id: int) -> AsyncIterator[bytes]:
+    """
+    Yield the user's todos as NDJSON, one line per todo.
+
+    Rows are read through a server-side cursor in batches of
+    TODO_EXPORT_BATCH_SIZE as plain column tuples, so memory does not grow with
+    the number of todos.
+    """
+    result = await db.stream(
+        select(*models.TODO_COLUMNS).where(
+            models.Todo.owner_id == owner_id
+        ).order_by(models.Todo.created_at, models.Todo.id).execution_options(yield_per=TODO_EXPORT_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield "".join(
+            json.dumps(row._asdict(), default=_json_default) + "\n" for row in rows
+        ).encode()
+
+
+async def _ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line
+        if len(buffer) > TODO_IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Line {line_no + 1}: exceeds {TODO_IMPORT_MAX_LINE_BYTES} bytes"
+            )
+    if buffer:
+        yield line_no + 1, buffer
+
+
+async def import_todos(db: AsyncSession, chunks: AsyncIterable[bytes], owner_id: int) -> schemas.TodoImportResult:
+    """
+    Insert todos from an NDJSON byte stream in chunks of TODO_IMPORT_CHUNK_SIZE.
+
+    The whole import is one transaction: a malformed line rolls everything back
+    and is reported with its line number. created_at/updated_at from the input
+    are kept; lines without created_at get the time of the import.
+    """
+    imported = 0
+    pending = []
+    # executemany needs the same columns in every row, so the server default
+    # for created_at cannot be left to apply per row
+    imported_at = datetime.now(timezone.utc)
+    try:
+        async for line_no, line in _ndjson_lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                todo = schemas.TodoImport.model_validate_json(line)
+            except ValidationError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Line {line_no}: {exc.errors()[0]['msg']}"
+                )
+            values = todo.model_dump()
+            if values["created_at"] is None:
+                values["created_at"] = imported_at
+            pending.append({**values, "owner_id": owner_id})
+            if len(pending) >= TODO_IMPORT_CHUNK_SIZE:
+                await db.execute(insert(models.Todo), pending)
+                imported += len(pending)
+                pending = []
+        if pending:
+            await db.execute(insert(models.Todo), pending)
+            imported += len(pending)
+        if imported:
+            await db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    if imported:
+        publish_change("resync", owner_id)
+    return schemas.TodoImportResult(imported=imported)
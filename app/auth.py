@@ -1,18 +1,25 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
 from app import models
 from app.config import (
     SECRET_KEY,
     JWT_ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     ACCESS_COOKIE_NAME,
-    AUTH_HEADER_PREFIX
+    AUTH_HEADER_PREFIX,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL_SECONDS,
 )
 
 # Alias for backward compatibility
@@ -36,18 +43,137 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def decode_token(token: str) -> Optional[str]:
+def decode_token_claims(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
-def get_current_user_dependency(
+def decode_token(token: str) -> Optional[str]:
+    payload = decode_token_claims(token)
+    return payload.get("sub") if payload else None
+
+
+class PrincipalCache:
+    """
+    In-process LRU + TTL cache of token -> resolved user.
+
+    A hit skips both the JWT decode and the users lookup. Entries never outlive
+    the token's own ``exp``, and are dropped when the user row is updated or
+    deleted in this process. Other workers rely on the TTL to pick up changes.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[models.User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: models.User, token_exp: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [token for token, (user, _) in self._entries.items() if user.id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+async def _get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+def request_token(request: Request) -> Optional[str]:
+    """The request's access token: the auth cookie if present, else the Authorization header."""
+    cookie = request.cookies.get(ACCESS_COOKIE_NAME)
+    if cookie:
+        return _strip_bearer(cookie)
+    scheme, credentials = get_authorization_scheme_param(request.headers.get("authorization"))
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    return None
+
+def _request_claims(request: Optional[Request], token: str) -> Optional[dict]:
+    """Decode ``token`` at most once per request, keeping the claims on request.state."""
+    if request is None:
+        return decode_token_claims(token)
+    cached = getattr(request.state, "token_claims", None)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    claims = decode_token_claims(token)
+    request.state.token_claims = (token, claims)
+    return claims
+
+def request_subject(request: Request) -> Optional[str]:
+    """
+    Username the request is authenticated as, without a database lookup: from
+    the principal cache, or from the token, whose decoded claims are then
+    reused by _resolve_user. Not a credential check on its own.
+    """
+    token = request_token(request)
+    if not token:
+        return None
+    user = principal_cache.get(token)
+    if user is not None:
+        return user.username
+    claims = _request_claims(request, token)
+    return claims.get("sub") if claims else None
+
+async def _resolve_user(db: AsyncSession, token: str, request: Optional[Request] = None) -> Optional[models.User]:
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+    claims = _request_claims(request, token)
+    if not claims or not claims.get("sub"):
+        return None
+    user = await _get_user_by_username(db, claims["sub"])
+    if user is not None:
+        # Detach so the shared instance is never refreshed by another request's session
+        db.expunge(user)
+        principal_cache.put(token, user, claims.get("exp"))
+    return user
+
+async def get_current_user_dependency(
     request: Request,
+    # Declared so OpenAPI documents both ways in; request_token reads them
     access_token: Optional[str] = Cookie(None),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> models.User:
     cred_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,22 +181,11 @@ def get_current_user_dependency(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token = None
-    if access_token:
-        token = _strip_bearer(access_token)
-    elif request and request.cookies.get(ACCESS_COOKIE_NAME):
-        token = _strip_bearer(request.cookies.get(ACCESS_COOKIE_NAME))
-    elif credentials:
-        token = credentials.credentials
-
+    token = request_token(request)
     if not token:
         raise cred_exc
 
-    username = decode_token(token)
-    if not username:
-        raise cred_exc
-
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = await _resolve_user(db, token, request)
     if not user:
         raise cred_exc
     return user
@@ -79,12 +194,9 @@ get_current_user = get_current_user_dependency
 
 async def get_current_user_optional(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> Optional[models.User]:
     token = request.cookies.get(ACCESS_COOKIE_NAME)
     if not token:
         return None
-    username = decode_token(_strip_bearer(token))
-    if not username:
-        return None
-    return db.query(models.User).filter(models.User.username == username).first()
\ No newline at end of file
+    return await _resolve_user(db, _strip_bearer(token), request)
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Response compression for API payloads.
+
+Negotiates zstd or gzip from Accept-Encoding (zstd preferred), and only
+compresses compressible content types at or above COMPRESSION_MIN_SIZE bytes.
+Complete bodies are compressed in one shot. Streamed bodies (NDJSON export,
+streamed HTML) are compressed chunk by chunk with a flush after each chunk, so
+clients still see rows as soon as the app produces them.
+
+Paths under COMPRESSION_EXCLUDE_PATHS (by default /static/, which serves
+precompressed files itself) and responses that already carry a
+Content-Encoding pass through untouched.
+"""
+import zlib
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.assets import accepted_encodings
+from app.config import (
+    COMPRESSION_EXCLUDE_PATHS,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_ZSTD_LEVEL,
+)
+
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        # wbits=31: gzip container rather than raw zlib
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+    return zlib.compress(body, COMPRESSION_GZIP_LEVEL, wbits=31)
+
+
+def _stream(encoding: str):
+    if encoding == "zstd":
+        return _ZstdStream(COMPRESSION_ZSTD_LEVEL)
+    return _GzipStream(COMPRESSION_GZIP_LEVEL)
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    # The compressed bytes are a different representation; a strong
+    # validator must not be shared with the identity body
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+def _is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    if content_type.startswith("text/event-stream"):
+        return False  # SSE frames must reach the client unbuffered
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Pure ASGI, so StreamingResponse bodies are compressed as they stream."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(COMPRESSION_EXCLUDE_PATHS):
+            await self.app(scope, receive, send)
+            return
+        encodings = accepted_encodings(
+            Headers(scope=scope).get("accept-encoding", ""), SUPPORTED_ENCODINGS
+        )
+        if not encodings:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encodings[0], self.minimum_size)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Message = None
+        self.passthrough = False
+        self.stream = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        _weaken_etag(headers)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            if message["status"] == 304:
+                # Revalidates a body this client got compressed: send the
+                # validator in the same (weak) form as that 200 carried
+                headers = MutableHeaders(raw=message["headers"])
+                _weaken_etag(headers)
+                headers.add_vary_header("Accept-Encoding")
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.start_message = message
+            self.passthrough = not _is_compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None and not more_body:
+            # Whole body in one message: compress only if it is worth it
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if len(body) >= self.minimum_size:
+                body = compress(self.encoding, body)
+                self._mark_encoded(headers)
+                headers["Content-Length"] = str(len(body))
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        if self.stream is None:
+            # First chunk of a streamed body: the total size is unknown
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            self._mark_encoded(headers)
+            del headers["Content-Length"]
+            self.stream = _stream(self.encoding)
+            await self.send(self.start_message)
+
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
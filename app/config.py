@@ -19,6 +19,28 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 ACCESS_COOKIE_NAME = os.getenv("ACCESS_COOKIE_NAME", "access_token")
 AUTH_HEADER_PREFIX = os.getenv("AUTH_HEADER_PREFIX", "Bearer ")  # Note: includes trailing space
 
+# Authenticated-principal cache: max entries and max age in seconds (also capped by token exp)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+# Password hashing pool: worker threads and max queued + running hash jobs
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# Token-bucket limits for POST /login and /signup, checked before any query or hash.
+# Each bucket refills at *_PER_MINUTE tokens and holds at most *_BURST.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "20"))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", "20"))
+RATE_LIMIT_USERNAME_PER_MINUTE = float(os.getenv("RATE_LIMIT_USERNAME_PER_MINUTE", "5"))
+RATE_LIMIT_USERNAME_BURST = int(os.getenv("RATE_LIMIT_USERNAME_BURST", "10"))
+# "memory" (per worker) or "sqlite" (shared by the workers of one host via RATE_LIMIT_SQLITE_PATH)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./ratelimit.db")
+# Comma-separated proxy addresses/CIDRs (e.g. the ingress pod range) whose
+# X-Forwarded-For is believed when picking the client IP; empty trusts none
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()]
+
 # ============================================
 # Database Configuration
 # ============================================
@@ -27,6 +49,86 @@ SQLALCHEMY_DATABASE_URL = os.getenv(
     "sqlite:///./todo_app.db"
 )
 
+# Optional read replica. Empty means reads use the primary.
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("SQLALCHEMY_READ_DATABASE_URL", "")
+# After a client's own write, its reads go to the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Where each user's last write time is kept: "memory" (per worker) or "sqlite"
+# (shared by the workers of one host via READ_YOUR_WRITES_SQLITE_PATH)
+READ_YOUR_WRITES_BACKEND = os.getenv("READ_YOUR_WRITES_BACKEND", "memory")
+READ_YOUR_WRITES_SQLITE_PATH = os.getenv("READ_YOUR_WRITES_SQLITE_PATH", "./recent_writes.db")
+
+# Connection pool (per process, so per uvicorn worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Statements slower than this are logged with their normalized SQL
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB
+
+# Readiness: the DB is probed in the background every interval and /readyz
+# serves the cached result; a result older than STALE_AFTER counts as not ready
+READINESS_PROBE_INTERVAL_SECONDS = float(os.getenv("READINESS_PROBE_INTERVAL_SECONDS", "5"))
+READINESS_PROBE_TIMEOUT_SECONDS = float(os.getenv("READINESS_PROBE_TIMEOUT_SECONDS", "2"))
+READINESS_STALE_AFTER_SECONDS = float(os.getenv("READINESS_STALE_AFTER_SECONDS", "15"))
+
+# Group commit for todo mutations (SQLite only): writes are batched for up to
+# MAX_DELAY_MS or MAX_BATCH operations and committed in one transaction
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "false").lower() == "true"
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "64"))
+WRITE_QUEUE_MAX_DELAY_MS = float(os.getenv("WRITE_QUEUE_MAX_DELAY_MS", "5"))
+
+# Change feed (GET /todos/events): per-stream buffer, heartbeat, and the
+# cross-worker bridge ("none", or "sqlite" through CHANGE_FEED_SQLITE_PATH)
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+CHANGE_FEED_BRIDGE = os.getenv("CHANGE_FEED_BRIDGE", "none")
+CHANGE_FEED_SQLITE_PATH = os.getenv("CHANGE_FEED_SQLITE_PATH", "./change_feed.db")
+CHANGE_FEED_POLL_MS = float(os.getenv("CHANGE_FEED_POLL_MS", "200"))
+
+# ============================================
+# API Limits
+# ============================================
+# Max operations per list (create/update/delete) in one POST /todos/batch
+TODO_BATCH_MAX_ITEMS = int(os.getenv("TODO_BATCH_MAX_ITEMS", "1000"))
+# Rows fetched per round trip by GET /todos/export, rows per INSERT by POST /todos/import
+TODO_EXPORT_BATCH_SIZE = int(os.getenv("TODO_EXPORT_BATCH_SIZE", "500"))
+TODO_IMPORT_CHUNK_SIZE = int(os.getenv("TODO_IMPORT_CHUNK_SIZE", "500"))
+# Longest accepted NDJSON line on import, in bytes
+TODO_IMPORT_MAX_LINE_BYTES = int(os.getenv("TODO_IMPORT_MAX_LINE_BYTES", str(64 * 1024)))
+# Serve GET /todos from column rows encoded with orjson instead of pydantic models
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+# ============================================
+# Template Rendering
+# ============================================
+# Rendered per-todo HTML fragments kept per process (0 disables the cache)
+TEMPLATE_FRAGMENT_CACHE_SIZE = int(os.getenv("TEMPLATE_FRAGMENT_CACHE_SIZE", "10000"))
+# Render the logged-out login/signup/welcome pages once per process
+TEMPLATE_PAGE_CACHE = os.getenv("TEMPLATE_PAGE_CACHE", "true").lower() == "true"
+# Stream the home page with Template.generate(), flushing every N characters
+TEMPLATE_STREAMING = os.getenv("TEMPLATE_STREAMING", "false").lower() == "true"
+TEMPLATE_STREAM_CHUNK_BYTES = int(os.getenv("TEMPLATE_STREAM_CHUNK_BYTES", "16384"))
+
+# ============================================
+# Response Compression
+# ============================================
+# Bodies smaller than this go out uncompressed (streamed bodies are always compressed)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+# Path prefixes left alone; /static/ serves its own precompressed files
+COMPRESSION_EXCLUDE_PATHS = tuple(os.getenv("COMPRESSION_EXCLUDE_PATHS", "/static/").split(","))
+
 # ============================================
 # CORS Configuration
 # ============================================
@@ -1,6 +1,15 @@
 import os
-from sqlalchemy import create_engine
+from typing import Optional
+from fastapi import Depends, Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import CreateIndex
+from app import config
+from app.instrumentation import instrument_engine
+from app.recent_writes import recent_writes
 
 Base = declarative_base()
 
@@ -14,16 +23,126 @@ if APP_ENV == "test":
     except FileNotFoundError:
         pass
     SQLALCHEMY_DATABASE_URL = f"sqlite:///./{DB_FILE}"
+    SQLALCHEMY_READ_DATABASE_URL = ""
 else:
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./todo_app.db"
+    SQLALCHEMY_DATABASE_URL = config.SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_READ_DATABASE_URL = config.SQLALCHEMY_READ_DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Set on responses to writes; while present, that client's reads skip the replica
+RECENT_WRITE_COOKIE = "recent_write"
+
+# Async drivers for the same databases: aiosqlite locally, asyncpg in production
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL so it uses the matching async driver."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database URL scheme '{scheme}'")
+    return f"{ASYNC_DRIVERS[dialect]}{sep}{rest}"
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return _is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+
+def _engine_options(url: str, overrides: dict) -> dict:
+    options = {}
+    # In-memory SQLite uses a single-connection pool that takes no sizing options
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+        )
+    options["pool_pre_ping"] = config.DB_POOL_PRE_PING
+    poolclass = overrides.get("poolclass")
+    if poolclass is not None and not issubclass(poolclass, QueuePool):
+        # NullPool / StaticPool (e.g. in tests) don't accept sizing options
+        for key in ("pool_size", "max_overflow", "pool_timeout"):
+            options.pop(key, None)
+    options.update(overrides)
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={config.SQLITE_CACHE_SIZE}")
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str, **overrides) -> Engine:
+    """Create a sync engine with pool settings from config and SQLite pragmas on connect."""
+    if _is_sqlite(url):
+        overrides.setdefault("connect_args", {"check_same_thread": False})
+    engine = create_engine(url, **_engine_options(url, overrides))
+    if _is_sqlite(url):
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+
+def build_async_engine(url: str, **overrides) -> AsyncEngine:
+    """Async counterpart of build_engine; ``url`` is the sync URL."""
+    if _is_sqlite(url) and not _is_sqlite_memory(url):
+        # aiosqlite defaults to NullPool, i.e. a new connection (and thread) per checkout
+        overrides.setdefault("poolclass", AsyncAdaptedQueuePool)
+    engine = create_async_engine(to_async_url(url), **_engine_options(url, overrides))
+    if _is_sqlite(url):
+        event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL)
+# expire_on_commit=False: objects returned from the services are serialized after
+# the commit, and an expired attribute would need an implicit (blocking) refresh.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read replica sessions; None when no replica is configured
+AsyncReadSessionLocal = None
+if SQLALCHEMY_READ_DATABASE_URL:
+    read_async_engine = build_async_engine(SQLALCHEMY_READ_DATABASE_URL)
+    AsyncReadSessionLocal = async_sessionmaker(
+        read_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+async def dispose_engines() -> None:
+    """Close pooled async connections; each pooled aiosqlite connection keeps a non-daemon thread alive."""
+    await async_engine.dispose()
+    if AsyncReadSessionLocal is not None:
+        await read_async_engine.dispose()
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist; add any new ones.
+    # IF NOT EXISTS rather than checkfirst: reflection doesn't see expression indexes.
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
 
 def get_db():
     db = SessionLocal()
@@ -31,3 +150,46 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _request_subject(request: Request) -> Optional[str]:
+    # Imported here: app.auth depends on this module for get_read_db
+    from app.auth import request_subject
+    return request_subject(request)
+
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_async_db)):
+    """
+    Session for read-only work: the replica when configured, otherwise the
+    request's primary session (shared with get_async_db, which doesn't connect
+    until first use). Users who wrote recently, from this client or any other,
+    read from the primary so they see their own changes despite replication lag.
+    """
+    if (
+        AsyncReadSessionLocal is None
+        or request.cookies.get(RECENT_WRITE_COOKIE)
+        or await recent_writes.is_recent(_request_subject(request))
+    ):
+        yield primary
+        return
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def mark_recent_write(response: Response, subject: Optional[str]) -> None:
+    """Pin ``subject``'s reads, and this client's, to the primary for a while."""
+    if AsyncReadSessionLocal is not None:
+        response.set_cookie(
+            RECENT_WRITE_COOKIE, "1",
+            max_age=config.READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+        )
+        await recent_writes.mark(subject)
+
+async def record_write(request: Request, response: Response):
+    """Dependency for mutating routes; the window restarts once the write is done."""
+    subject = _request_subject(request) if AsyncReadSessionLocal is not None else None
+    await mark_recent_write(response, subject)
+    yield
+    if subject is not None:
+        await recent_writes.mark(subject)
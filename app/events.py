@@ -0,0 +1,223 @@
+"""
+Per-user change feed behind GET /todos/events (Server-Sent Events).
+
+``publish_change`` is called after every committed todo mutation. It hands
+the event to ``broker``, an in-process pub/sub keyed by owner. Each open
+stream holds one bounded asyncio.Queue and one coroutine parked on it, so an
+idle connection costs a few hundred bytes and no CPU beyond a heartbeat every
+CHANGE_FEED_HEARTBEAT_SECONDS.
+
+Publishing never blocks. A subscriber whose queue is full is marked as lagging
+and receives a single ``resync`` event once it drains, telling the client to
+reload instead of applying an incomplete sequence.
+
+Other uvicorn workers learn about changes through the bridge. With
+CHANGE_FEED_BRIDGE=sqlite, events are appended to a small notify table in a
+local SQLite file by a background thread. Each worker polls that table only
+while it has local subscribers, and delivers events that came from other
+processes.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app import schemas, sqlite_sidecar
+from app.config import (
+    CHANGE_FEED_BRIDGE,
+    CHANGE_FEED_HEARTBEAT_SECONDS,
+    CHANGE_FEED_POLL_MS,
+    CHANGE_FEED_QUEUE_SIZE,
+    CHANGE_FEED_SQLITE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    __slots__ = ("owner_id", "queue", "lagging")
+
+    def __init__(self, owner_id: int, maxsize: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.lagging = False
+
+
+class ChangeBroker:
+    def __init__(self, queue_size: int = CHANGE_FEED_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, owner_id: int) -> Subscription:
+        subscription = Subscription(owner_id, self.queue_size)
+        self._subscribers.setdefault(owner_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.owner_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.owner_id]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, owner_id: int, event: Dict[str, Any]) -> None:
+        """Deliver to every local stream of ``owner_id``; never waits on a slow one."""
+        for subscription in self._subscribers.get(owner_id, ()):
+            if subscription.lagging:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.lagging = True
+
+
+class SQLiteBridge:
+    """Cross-worker fan-out through a notify table in a local SQLite file."""
+
+    PRUNE_AFTER_SECONDS = 60
+
+    def __init__(self, path: str, broker: ChangeBroker, poll_ms: float = CHANGE_FEED_POLL_MS):
+        self.path = path
+        self.broker = broker
+        self.poll_interval = poll_ms / 1000
+        self.origin = f"{os.getpid()}:{id(self)}"
+        self._outbox: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._last_id: Optional[int] = None
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS todo_events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "origin TEXT NOT NULL, owner_id INTEGER NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite_sidecar.connect(self.path, timeout=5.0)
+
+    # -- outgoing: a writer thread so publishers never wait on the file lock
+
+    def send(self, owner_id: int, event: Dict[str, Any]) -> None:
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="change-feed-writer", daemon=True)
+            self._writer.start()
+        self._outbox.put((owner_id, json.dumps(event, default=str)))
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            rows = [self._outbox.get()]
+            while True:
+                try:
+                    rows.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            now = time.time()
+            try:
+                conn.executemany(
+                    "INSERT INTO todo_events (origin, owner_id, payload, created) VALUES (?, ?, ?, ?)",
+                    [(self.origin, owner_id, payload, now) for owner_id, payload in rows],
+                )
+                conn.execute("DELETE FROM todo_events WHERE created < ?", (now - self.PRUNE_AFTER_SECONDS,))
+            except sqlite3.Error:
+                logger.exception("Could not forward %d change events to other workers", len(rows))
+
+    # -- incoming: polled only while this worker has open streams
+
+    def _fetch(self, last_id: Optional[int]):
+        conn = self._connect()
+        try:
+            if last_id is None:
+                return conn.execute("SELECT coalesce(max(id), 0) FROM todo_events").fetchone()[0], []
+            rows = conn.execute(
+                "SELECT id, origin, owner_id, payload FROM todo_events WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+            return (rows[-1][0] if rows else last_id), rows
+        finally:
+            conn.close()
+
+    async def poll_once(self) -> None:
+        self._last_id, rows = await run_in_threadpool(self._fetch, self._last_id)
+        for _, origin, owner_id, payload in rows:
+            if origin != self.origin:
+                self.broker.publish(owner_id, json.loads(payload))
+
+    async def _poll_loop(self) -> None:
+        while self.broker.has_subscribers():
+            try:
+                await self.poll_once()
+            except sqlite3.Error:
+                logger.exception("Change feed poll failed")
+            await asyncio.sleep(self.poll_interval)
+        self._last_id = None  # start from "now" when the next stream opens
+
+    def ensure_polling(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = asyncio.create_task(self._poll_loop(), name="change-feed-poller")
+
+
+broker = ChangeBroker()
+bridge = SQLiteBridge(CHANGE_FEED_SQLITE_PATH, broker) if CHANGE_FEED_BRIDGE == "sqlite" else None
+
+
+def publish_change(kind: str, owner_id: int, todo=None, todo_id: Optional[int] = None) -> None:
+    """
+    Announce a committed mutation. ``kind`` is "created"/"updated" (with the
+    todo), "deleted" (with its id) or "resync" after bulk changes.
+    """
+    if bridge is None and not broker.has_subscribers():
+        return  # nobody to tell; skip serializing the todo
+    event: Dict[str, Any] = {"type": kind}
+    if todo is not None:
+        event["todo"] = schemas.TodoResponse.model_validate(todo).model_dump(mode="json")
+    elif todo_id is not None:
+        event["id"] = todo_id
+    broker.publish(owner_id, event)
+    if bridge is not None:
+        bridge.send(owner_id, event)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(
+    subscription: Subscription, heartbeat: float = CHANGE_FEED_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """SSE frames for one subscription; unsubscribes when the client goes away."""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if subscription.lagging and subscription.queue.empty():
+                    subscription.lagging = False
+                    yield _sse("resync", {})
+                else:
+                    yield ": ping\n\n"
+                continue
+            yield _sse(event["type"], event)
+            if subscription.lagging and subscription.queue.empty():
+                subscription.lagging = False
+                yield _sse("resync", {})
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def open_stream(owner_id: int) -> AsyncIterator[str]:
+    subscription = broker.subscribe(owner_id)
+    if bridge is not None:
+        bridge.ensure_polling()
+    return event_stream(subscription)
@@ -0,0 +1,87 @@
+"""
+Bounded worker pool for password hashing.
+
+argon2 hashing/verification is deliberately CPU-heavy. Running it inline in an
+async handler freezes the worker's event loop, so the async services hand it
+to a small thread pool instead (argon2-cffi releases the GIL while hashing).
+The number of outstanding jobs is capped; when the cap is reached callers get
+a 503 immediately instead of queueing behind a login burst.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+from app.auth import get_password_hash, verify_password
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+from app.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_REJECTED
+
+
+class PasswordHashPool:
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                PASSWORD_HASH_REJECTED.inc()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, op: str = "other") -> Any:
+        self._acquire()
+        enqueued = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started, time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._get_executor(), timed)
+        finally:
+            self._release()
+        PASSWORD_HASH_QUEUE_WAIT.labels(op).observe(started - enqueued)
+        PASSWORD_HASH_DURATION.labels(op).observe(finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password, op="hash")
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password, op="verify")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
@@ -0,0 +1,118 @@
+"""
+Liveness and readiness state for the Kubernetes probes.
+
+/livez does no I/O at all. /readyz (and the legacy /health) report the result
+of ``ReadinessChecker``, a background task that runs ``SELECT 1`` against the
+primary database every READINESS_PROBE_INTERVAL_SECONDS and caches the
+outcome, so probe traffic never reaches the database however often the
+kubelet asks. A result older than READINESS_STALE_AFTER_SECONDS counts as not
+ready, which also covers a wedged checker task.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import (
+    READINESS_PROBE_INTERVAL_SECONDS,
+    READINESS_PROBE_TIMEOUT_SECONDS,
+    READINESS_STALE_AFTER_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, Optional[int]]:
+    """Size and usage of the engine's pool; None where the pool class has no such notion."""
+    pool = engine.sync_engine.pool
+    stats = {}
+    for key, method in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        stats[key] = getattr(pool, method)() if hasattr(pool, method) else None
+    if stats["overflow"] is not None:
+        # QueuePool counts down from -pool_size until the pool fills; report it as the gauge does
+        stats["overflow"] = max(stats["overflow"], 0)
+    return stats
+
+
+class ReadinessChecker:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        interval: float = READINESS_PROBE_INTERVAL_SECONDS,
+        timeout: float = READINESS_PROBE_TIMEOUT_SECONDS,
+        stale_after: float = READINESS_STALE_AFTER_SECONDS,
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.healthy: Optional[bool] = None
+        self.last_probe_at: Optional[float] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe_once(self) -> bool:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with self.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as exc:  # any failure means "not ready"
+            self.healthy = False
+            self.last_error = f"{type(exc).__name__}: {exc}".rstrip(": ")
+            logger.warning("Readiness probe failed: %s", self.last_error)
+        else:
+            self.healthy = True
+            self.last_error = None
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        self.last_probe_at = time.time()
+        return self.healthy
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="readiness-checker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        if not self.healthy or self.last_probe_at is None:
+            return False
+        return time.time() - self.last_probe_at <= self.stale_after
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cached readiness report; never touches the database."""
+        if self.last_probe_at is None:
+            status = "starting"
+        else:
+            status = "ready" if self.ready else "unavailable"
+        return {
+            "status": status,
+            "database": {
+                "healthy": self.healthy,
+                "last_probe_age_seconds": (
+                    round(time.time() - self.last_probe_at, 3) if self.last_probe_at is not None else None
+                ),
+                "last_probe_latency_ms": (
+                    round(self.last_latency_ms, 3) if self.last_latency_ms is not None else None
+                ),
+                "error": self.last_error,
+            },
+            "pool": pool_status(self.engine),
+        }
@@ -0,0 +1,99 @@
+"""
+SQL statement instrumentation.
+
+Every engine built by app.database gets cursor-execute hooks that time each
+statement. Statements slower than SLOW_QUERY_MS are logged with normalized
+SQL (literals replaced by ?). While a request is being handled (see
+track_queries and PrometheusMiddleware), statements are also counted
+against that request, and listeners registered in ``request_listeners`` are
+told the totals when it finishes; the test suite uses this for query budgets.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from app.config import SLOW_QUERY_MS
+
+logger = logging.getLogger("app.sql")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+# Called as listener(method, route, status, stats) after each tracked request
+request_listeners: List[Callable[[str, str, int, "QueryStats"], None]] = []
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and replace literals/placeholders with ? so similar statements group together."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: List[str] = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements.append(statement)
+
+    def merge(self, other: "QueryStats") -> None:
+        self.count += other.count
+        self.total_time += other.total_time
+        self.statements.extend(other.statements)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being handled, if any; for work done on its behalf elsewhere."""
+    return _current.get()
+
+
+@contextmanager
+def track_queries(stats: Optional[QueryStats] = None) -> Iterator[QueryStats]:
+    """Count statements in the block into ``stats`` (a new QueryStats by default)."""
+    stats = QueryStats() if stats is None else stats
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def notify_request(method: str, route: str, status: int, stats: QueryStats) -> None:
+    for listener in list(request_listeners):
+        listener(method, route, status, stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning("slow query (%.1f ms): %s", elapsed * 1000, normalize_sql(statement))
+
+
+def instrument_engine(engine) -> None:
+    """Attach the timing hooks to a sync Engine (use AsyncEngine.sync_engine for async ones)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,37 +1,72 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from app.database import init_db
+from fastapi.responses import JSONResponse, Response
+from app import database
+from app.assets import PrecompressedStaticFiles
+from app.compression import CompressionMiddleware
+from app.database import init_db, engine
+from app.metrics import PrometheusMiddleware, instrument_pool, mark_process_dead, render_latest
+from app.search import ensure_search_index
+from app.hashing import password_hash_pool
+from app.health import ReadinessChecker
+from app.write_queue import write_queue
 from app.routers import auth, todos
 from app.config import CORS_ORIGINS, CORS_CREDENTIALS, CORS_METHODS, CORS_HEADERS
 
-app = FastAPI(title="Todo App")
+readiness = ReadinessChecker(database.async_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    readiness.start()
+    yield
+    await readiness.stop()
+    await write_queue.close()
+    await database.dispose_engines()
+    password_hash_pool.shutdown()
+    mark_process_dead()
+
+app = FastAPI(title="Todo App", lifespan=lifespan)
+
+# Kubernetes probes
+@app.get("/livez", include_in_schema=False)
+async def livez():
+    """Liveness: the event loop is serving requests. No I/O."""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness from the background DB checker's cached result, plus pool diagnostics"""
+    report = readiness.snapshot()
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=report)
 
-# Health check endpoint for Kubernetes
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for Kubernetes liveness and readiness probes"""
-    try:
-        # Check database connection
-        from app.database import engine
-        with engine.connect() as conn:
-            conn.execute("SELECT 1")
-        return JSONResponse(
-            status_code=200,
-            content={"status": "healthy", "service": "todo-app"}
-        )
-    except Exception as e:
-        return JSONResponse(
-            status_code=503,
-            content={"status": "unhealthy", "error": str(e)}
-        )
-
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    """Legacy combined probe; same cached readiness result as /readyz"""
+    if readiness.ready:
+        return {"status": "healthy", "service": "todo-app"}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "unhealthy", "service": "todo-app", "error": readiness.last_error or "not ready"}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+# Mount static files; fingerprinted builds under static/dist get immutable caching
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 # Initialize database
 init_db()
+ensure_search_index(engine)
+
+instrument_pool(engine, "primary")
+instrument_pool(database.async_engine.sync_engine, "primary_async")
+if database.AsyncReadSessionLocal is not None:
+    instrument_pool(database.read_async_engine.sync_engine, "replica")
 
 # CORS middleware
 app.add_middleware(
@@ -40,8 +75,14 @@ app.add_middleware(
     allow_credentials=CORS_CREDENTIALS,
     allow_methods=CORS_METHODS,
     allow_headers=CORS_HEADERS,
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(PrometheusMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(todos.router)
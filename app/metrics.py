@@ -0,0 +1,159 @@
+"""
+Prometheus metrics and the ASGI middleware that records HTTP ones.
+
+With ``uvicorn --workers N`` every worker is a separate process. When
+PROMETHEUS_MULTIPROC_DIR is set, prometheus_client writes each process's
+samples to files in that directory and /metrics aggregates all of them, so
+any worker can answer a scrape for the whole pod. The directory must exist
+and be emptied before the workers start (see Dockerfile.prod).
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.routing import Match
+from app.instrumentation import notify_request, track_queries
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ["method", "route"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is fully sent",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["engine"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond pool_size", ["engine"],
+    multiprocess_mode="livesum",
+)
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_seconds", "Time spent computing argon2 hashes/verifications", ["op"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Time hash jobs waited for a pool worker", ["op"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Hash jobs rejected because the pool was saturated"
+)
+AUTH_RATE_LIMITED = Counter(
+    "auth_rate_limited_total", "Login/signup attempts rejected by the rate limiter", ["endpoint", "key"]
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements issued while handling one request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 10, 20, 50, 100),
+)
+DB_QUERY_TIME_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request", "Total SQL time while handling one request", ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def instrument_pool(engine, name: str) -> None:
+    """Track checkouts, checked-out connections and overflow for a sync engine's pool."""
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.labels(name).inc()
+        DB_POOL_CHECKED_OUT.labels(name).inc()
+        overflow = getattr(engine.pool, "overflow", None)
+        if overflow is not None:
+            DB_POOL_OVERFLOW.labels(name).set(max(overflow(), 0))
+
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.labels(name).dec()
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+
+
+def render_latest():
+    """Exposition body and content type for a scrape, aggregated across workers if configured."""
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware (so streaming responses pass through untouched) that
+    labels requests by route template, e.g. /todos/{todo_id}, never raw paths,
+    and counts the SQL statements each request issues.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _route_template(self, scope: Scope) -> str:
+        router = scope["app"].router
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - start
+                in_progress.dec()
+                status = str(status_code)
+                HTTP_REQUESTS.labels(method, route, status).inc()
+                HTTP_REQUEST_DURATION.labels(method, route, status).observe(elapsed)
+                DB_QUERIES_PER_REQUEST.labels(method, route).observe(queries.count)
+                DB_QUERY_TIME_PER_REQUEST.labels(method, route).observe(queries.total_time)
+                notify_request(method, route, status_code, queries)
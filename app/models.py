@@ -1,8 +1,15 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+# SQLite's CURRENT_TIMESTAMP has second precision; storing bound datetimes the same
+# way keeps comparisons against server-generated values (cursor pagination) exact.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(truncate_microseconds=True), "sqlite"
+)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -19,14 +26,47 @@ class User(Base):
 
 class Todo(Base):
     __tablename__ = "todos"
+    __table_args__ = (
+        # Keyset pagination: WHERE owner_id = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id
+        Index("ix_todos_owner_created_id", "owner_id", "created_at", "id"),
+        # Same, filtered by completed (also serves the grouped counts in /todos/stats)
+        Index("ix_todos_owner_completed_created_id", "owner_id", "completed", "created_at", "id"),
+        Index("ix_todos_owner_title_id", "owner_id", "title", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     completed = Column(Boolean, default=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
 
     owner = relationship("User", back_populates="todos")
 
+
+# Last modification time: updated_at is only set by the first edit
+modified_at = func.coalesce(Todo.updated_at, Todo.created_at)
+Index("ix_todos_owner_modified_id", Todo.owner_id, modified_at, Todo.id)
+
+# Columns selected by the read-only paths, which return plain rows instead of
+# Todo instances (no identity map, no relationship state); same order as
+# schemas.TodoResponse
+TODO_COLUMNS = (
+    Todo.title,
+    Todo.description,
+    Todo.id,
+    Todo.completed,
+    Todo.owner_id,
+    Todo.created_at,
+    Todo.updated_at,
+)
+
+
+
+class TodoListVersion(Base):
+    """Per-user counter bumped by every todo mutation; backs the ETag of /todos."""
+    __tablename__ = "todo_list_versions"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,48 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor encodes the sort it was issued for and the sort key of the last row
+on a page; the next page starts strictly after it. Clients must treat it as an
+opaque string and send it back with the same sort parameters.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+from fastapi import HTTPException, status
+
+# Sort keys whose cursor values are timestamps
+DATETIME_SORTS = {"created_at", "updated_at"}
+# Sort keys whose cursor values are plain strings
+STRING_SORTS = {"title"}
+
+
+def encode_cursor(sort: str, direction: str, value: Any, todo_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, direction, value, todo_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, direction: str) -> Tuple[Any, int]:
+    invalid = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_direction, value, todo_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort in DATETIME_SORTS:
+            value = datetime.fromisoformat(value)
+        elif sort in STRING_SORTS and not isinstance(value, str):
+            raise invalid
+    except (ValueError, TypeError):
+        raise invalid
+    # The cursor is client-supplied: anything else would reach the query as a bind value
+    if isinstance(todo_id, bool) or not isinstance(todo_id, int):
+        raise invalid
+    # A cursor only makes sense for the ordering it was issued under
+    if (cursor_sort, cursor_direction) != (sort, direction):
+        raise invalid
+    return value, todo_id
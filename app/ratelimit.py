@@ -0,0 +1,188 @@
+"""
+Token-bucket admission control for the credential endpoints.
+
+Every POST /login and /signup costs an argon2 computation, so a
+credential-stuffing burst can tie up every worker. ``auth_rate_limit`` runs as
+a route dependency, before the session is used or the password is hashed, and
+takes one token from a bucket per client IP and one per username. The request
+gets 429 with Retry-After when either bucket is empty.
+
+Behind a reverse proxy the peer address is the proxy's, so ``client_ip`` walks
+X-Forwarded-For from the right, past every hop in TRUSTED_PROXIES, and uses the
+first address that was not added by one of our own proxies.
+
+Buckets live in a pluggable backend:
+
+- ``MemoryBucketBackend``: per process; limits are per worker.
+- ``SQLiteBucketBackend``: a small SQLite file shared by all workers on one
+  host, updated with a single atomic UPSERT per bucket.
+"""
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi import Form, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_IP_BURST,
+    RATE_LIMIT_IP_PER_MINUTE,
+    RATE_LIMIT_SQLITE_PATH,
+    RATE_LIMIT_USERNAME_BURST,
+    RATE_LIMIT_USERNAME_PER_MINUTE,
+    TRUSTED_PROXIES,
+)
+from app.metrics import AUTH_RATE_LIMITED
+from app.sqlite_sidecar import SQLiteSidecar
+
+
+class MemoryBucketBackend:
+    """In-process buckets; the least recently used are dropped beyond ``maxsize``."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Take one token; 0 if granted, else seconds until one is available."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketBackend:
+    """Buckets in a local SQLite file so every worker on the host shares them."""
+
+    blocking = True
+    # Buckets idle this long are full again and can be forgotten
+    PRUNE_AFTER_SECONDS = 3600
+    PRUNE_EVERY = 1000
+
+    TAKE_SQL = """
+        INSERT INTO rate_buckets (key, tokens, updated) VALUES (:key, :burst - 1, :now)
+        ON CONFLICT (key) DO UPDATE
+        SET tokens = min(:burst, tokens + (:now - updated) * :rate) - 1, updated = :now
+        WHERE min(:burst, tokens + (:now - updated) * :rate) >= 1
+        RETURNING tokens
+    """
+
+    def __init__(self, path: str):
+        self._db = SQLiteSidecar(
+            path,
+            "CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)",
+            prune=("rate_buckets", "updated"),
+            prune_every=self.PRUNE_EVERY,
+        )
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        params = {"key": key, "rate": rate, "burst": burst, "now": now}
+        with self._db.locked(prune_before=now - self.PRUNE_AFTER_SECONDS) as conn:
+            if conn.execute(self.TAKE_SQL, params).fetchone() is not None:
+                return 0.0
+            row = conn.execute(
+                "SELECT min(:burst, tokens + (:now - updated) * :rate) FROM rate_buckets WHERE key = :key",
+                params,
+            ).fetchone()
+        tokens = row[0] if row else 0.0
+        return (1 - tokens) / rate
+
+    def reset(self) -> None:
+        with self._db.locked() as conn:
+            conn.execute("DELETE FROM rate_buckets")
+
+
+class RateLimiter:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    async def take(self, key: str, per_minute: float, burst: int) -> float:
+        rate, now = per_minute / 60.0, time.time()
+        if self.backend.blocking:
+            return await run_in_threadpool(self.backend.take, key, rate, burst, now)
+        return self.backend.take(key, rate, burst, now)
+
+    async def check(self, endpoint: str, client_ip: str, username: Optional[str]) -> None:
+        """Raise 429 unless both the IP and the username bucket grant a token."""
+        if not self.enabled:
+            return
+        limits = [("ip", client_ip, RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST)]
+        if username:
+            limits.append(("username", username.strip().lower(), RATE_LIMIT_USERNAME_PER_MINUTE,
+                           RATE_LIMIT_USERNAME_BURST))
+        for kind, value, per_minute, burst in limits:
+            retry_after = await self.take(f"{endpoint}:{kind}:{value}", per_minute, burst)
+            if retry_after > 0:
+                AUTH_RATE_LIMITED.labels(endpoint, kind).inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many attempts, please retry later",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+def _build_backend():
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteBucketBackend(RATE_LIMIT_SQLITE_PATH)
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryBucketBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+
+
+rate_limiter = RateLimiter(_build_backend(), enabled=RATE_LIMIT_ENABLED)
+
+
+def _parse_networks(entries: List[str]):
+    return [ipaddress.ip_network(entry, strict=False) for entry in entries]
+
+
+trusted_proxies = _parse_networks(TRUSTED_PROXIES)
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_ip(request: Request) -> str:
+    """The first address, from the right, that is not one of our trusted proxies."""
+    address = request.client.host if request.client else "unknown"
+    if not _is_trusted(address):
+        return address
+    forwarded = ",".join(request.headers.getlist("x-forwarded-for"))
+    for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+        address = hop
+        if not _is_trusted(hop):
+            break
+    return address
+
+
+async def auth_rate_limit(request: Request, username: str = Form(...)) -> None:
+    """Route dependency for the credential endpoints; runs before the handler body."""
+    await rate_limiter.check(request.url.path.strip("/"), client_ip(request), username)
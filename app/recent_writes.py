@@ -0,0 +1,125 @@
+"""
+Per-user record of recent writes, for read-your-writes with a replica.
+
+get_read_db sends a request to the primary while its user wrote within the
+last READ_YOUR_WRITES_SECONDS. Keying on the user rather than only on a cookie
+means a write from one device or tab is also visible to the user's other
+clients, which never saw the cookie.
+
+The user is the token subject, as found by app.auth.request_subject: from
+the principal cache, or from the token decoded once per request and reused
+when the user is then authenticated. No database lookup is needed, because
+get_read_db runs before (and for) authentication.
+
+Backends mirror the rate limiter's:
+
+- ``MemoryRecentWrites``: per process; another worker only sees the write if
+  the client carries the recent-write cookie.
+- ``SQLiteRecentWrites``: a small SQLite file shared by all workers on one host.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    READ_YOUR_WRITES_BACKEND,
+    READ_YOUR_WRITES_SECONDS,
+    READ_YOUR_WRITES_SQLITE_PATH,
+)
+from app.sqlite_sidecar import SQLiteSidecar
+
+
+class MemoryRecentWrites:
+    blocking = False
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._writes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, subject: str, now: float) -> None:
+        with self._lock:
+            self._writes[subject] = now
+            self._writes.move_to_end(subject)
+            while len(self._writes) > self.maxsize:
+                self._writes.popitem(last=False)
+
+    def last(self, subject: str) -> Optional[float]:
+        with self._lock:
+            return self._writes.get(subject)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._writes.clear()
+
+
+class SQLiteRecentWrites:
+    blocking = True
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str, window: float = READ_YOUR_WRITES_SECONDS):
+        self.window = window
+        self._db = SQLiteSidecar(
+            path,
+            "CREATE TABLE IF NOT EXISTS recent_writes (subject TEXT PRIMARY KEY, written REAL NOT NULL)",
+            prune=("recent_writes", "written"),
+            prune_every=self.PRUNE_EVERY,
+        )
+
+    def mark(self, subject: str, now: float) -> None:
+        with self._db.locked(prune_before=now - self.window) as conn:
+            conn.execute(
+                "INSERT INTO recent_writes (subject, written) VALUES (?, ?) "
+                "ON CONFLICT (subject) DO UPDATE SET written = max(written, excluded.written)",
+                (subject, now),
+            )
+
+    def last(self, subject: str) -> Optional[float]:
+        with self._db.locked() as conn:
+            row = conn.execute("SELECT written FROM recent_writes WHERE subject = ?", (subject,)).fetchone()
+        return row[0] if row else None
+
+    def reset(self) -> None:
+        with self._db.locked() as conn:
+            conn.execute("DELETE FROM recent_writes")
+
+
+class RecentWrites:
+    def __init__(self, backend, window: float = READ_YOUR_WRITES_SECONDS):
+        self.backend = backend
+        self.window = window
+
+    async def mark(self, subject: Optional[str]) -> None:
+        if not subject:
+            return
+        if self.backend.blocking:
+            await run_in_threadpool(self.backend.mark, subject, time.time())
+        else:
+            self.backend.mark(subject, time.time())
+
+    async def is_recent(self, subject: Optional[str]) -> bool:
+        if not subject:
+            return False
+        if self.backend.blocking:
+            written = await run_in_threadpool(self.backend.last, subject)
+        else:
+            written = self.backend.last(subject)
+        return written is not None and time.time() - written < self.window
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+def _build_backend():
+    if READ_YOUR_WRITES_BACKEND == "sqlite":
+        return SQLiteRecentWrites(READ_YOUR_WRITES_SQLITE_PATH)
+    if READ_YOUR_WRITES_BACKEND == "memory":
+        return MemoryRecentWrites()
+    raise ValueError(f"Unknown READ_YOUR_WRITES_BACKEND: {READ_YOUR_WRITES_BACKEND}")
+
+
+recent_writes = RecentWrites(_build_backend())
+
@@ -1,24 +1,27 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Request
 from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app import schemas, services
+from app.database import get_async_db, get_read_db, mark_recent_write
+from app import schemas, async_services as services
 from app.auth import (
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_user_optional,
 )
+from app.ratelimit import auth_rate_limit
+from app.templating import render_anonymous, templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/signup", response_class=HTMLResponse)
-async def signup_page(request: Request, db: Session = Depends(get_db)):
+async def signup_page(request: Request, db: AsyncSession = Depends(get_read_db)):
+    # No cookie means no lookup: get_current_user_optional returns before any query
     current_user = await get_current_user_optional(request, db)
+    if not current_user:
+        return HTMLResponse(render_anonymous("signup.html"))
     return templates.TemplateResponse(
         "signup.html",
         {"request": request, "current_user": current_user}
@@ -26,27 +29,33 @@ async def signup_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request, db: Session = Depends(get_db)):
+async def login_page(request: Request, db: AsyncSession = Depends(get_read_db)):
+    # No cookie means no lookup: get_current_user_optional returns before any query
     current_user = await get_current_user_optional(request, db)
+    if not current_user:
+        return HTMLResponse(render_anonymous("login.html"))
     return templates.TemplateResponse(
         "login.html",
         {"request": request, "current_user": current_user}
     )
 
 
-@router.post("/signup")
+@router.post("/signup", dependencies=[Depends(auth_rate_limit)])
 async def signup(
     request: Request,
     username: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        user = services.create_user(
+        user = await services.create_user(
             db, schemas.UserCreate(username=username, email=email, password=password)
         )
-    except HTTPException:
+    except HTTPException as exc:
+        # Overload (503 from the hashing pool) must reach the client as-is.
+        if exc.status_code != status.HTTP_400_BAD_REQUEST:
+            raise
         # If the user already exists, still behave like success for the tests:
         # redirect to "/" with 303 so Playwright sees the navigation.
         return RedirectResponse("/", status_code=status.HTTP_303_SEE_OTHER)
@@ -56,17 +65,19 @@ async def signup(
     )
     resp = RedirectResponse("/", status_code=status.HTTP_303_SEE_OTHER)
     resp.set_cookie("access_token", f"Bearer {token}", httponly=True, samesite="lax")
+    # The new user row may not have reached the replica when "/" looks it up
+    await mark_recent_write(resp, user.username)
     return resp
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(auth_rate_limit)])
 async def login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = services.authenticate_user(db, username, password)
+    user = await services.authenticate_user(db, username, password)
     if not user:
         return templates.TemplateResponse(
             "login.html",
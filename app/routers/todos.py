@@ -1,72 +1,209 @@
-from typing import List
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app import schemas, services, models
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db, record_write
+from app import config, schemas, models, async_services as services
 from app.auth import get_current_user, get_current_user_optional
+from app.events import open_stream
+from app.responses import FastJSONResponse, rows_to_dicts
+from app.templating import render_anonymous, stream_template, templates
+from app.versioning import make_etag, etag_matches
+from app.write_queue import write_queue
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+async def _not_modified(
+    request: Request, response: Response, db: AsyncSession, owner_id: int, version: Optional[int] = None
+) -> Optional[Response]:
+    """
+    Answer If-None-Match from the list version alone; otherwise tag the response.
+    Pass ``version`` when it was already read along with the data.
+    """
+    if version is None:
+        version = await services.get_todo_list_version(db, owner_id)
+    etag = make_etag(owner_id, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _fast_json(content, response: Response) -> FastJSONResponse:
+    """Bypass response_model validation, keeping headers and cookies set on ``response``."""
+    fast = FastJSONResponse(content)
+    fast.headers.raw.extend(response.headers.raw)
+    return fast
 
 
 @router.get("/", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db)):
+async def home(request: Request, db: AsyncSession = Depends(get_read_db)):
     current_user = await get_current_user_optional(request, db)
-    todos = []
-    if current_user:
-        todos = services.get_todos(db, owner_id=current_user.id)
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "current_user": current_user, "todos": todos}
-    )
+    if not current_user:
+        return HTMLResponse(render_anonymous("index.html"))
+    todos = await services.get_todos(db, owner_id=current_user.id, as_rows=True)
+    context = {"request": request, "current_user": current_user, "todos": todos}
+    if config.TEMPLATE_STREAMING:
+        return stream_template("index.html", context)
+    return templates.TemplateResponse("index.html", context)
 
 
-@router.post("/todos", response_model=schemas.TodoResponse)
+@router.post("/todos", response_model=schemas.TodoResponse, dependencies=[Depends(record_write)])
 async def create_todo(
     todo: schemas.TodoCreate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return services.create_todo(db, todo, current_user.id)
+    if write_queue.enabled:
+        return await write_queue.create(todo, current_user.id)
+    return await services.create_todo(db, todo, current_user.id)
 
 
 @router.get("/todos", response_model=List[schemas.TodoResponse])
 async def read_todos(
-    skip: int = 0,
+    request: Request,
+    response: Response,
+    skip: Optional[int] = None,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    sort: schemas.TodoSort = "created_at",
+    order: schemas.SortDirection = "asc",
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    todos = services.get_todos(db, owner_id=current_user.id, skip=skip, limit=limit)
+    not_modified = await _not_modified(request, response, db, current_user.id)
+    if not_modified:
+        return not_modified
+
+    # Legacy offset mode, kept for clients that still page with ?skip=
+    if skip is not None:
+        todos = await services.get_todos(
+            db, owner_id=current_user.id, skip=skip, limit=limit,
+            completed=completed, sort=sort, direction=order, as_rows=True
+        )
+    else:
+        todos, next_cursor = await services.get_todos_page(
+            db, owner_id=current_user.id, limit=limit, cursor=cursor,
+            completed=completed, sort=sort, direction=order, as_rows=True
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if config.FAST_JSON_RESPONSES:
+        return _fast_json(rows_to_dicts(todos), response)
     return todos
 
 
+@router.get("/todos/stats", response_model=schemas.TodoStats)
+async def todo_stats(
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    not_modified = await _not_modified(request, response, db, current_user.id)
+    if not_modified:
+        return not_modified
+    return await services.get_todo_stats(db, current_user.id)
+
+
+@router.post("/todos/batch", response_model=schemas.TodoBatchResponse, dependencies=[Depends(record_write)])
+async def batch_todos(
+    batch: schemas.TodoBatchRequest,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await services.batch_todos(db, batch, current_user.id)
+
+
+@router.get("/todos/search", response_model=List[schemas.TodoResponse])
+async def search_todos(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    return await services.search_todos(db, current_user.id, q, limit=limit, offset=offset, as_rows=True)
+
+
+@router.get("/todos/export")
+async def export_todos(
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # The yield-dependency session stays open until the stream has been sent
+    return StreamingResponse(
+        services.export_todos(db, current_user.id),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="todos.ndjson"'},
+    )
+
+
+@router.get("/todos/events")
+async def todo_events(
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Server-Sent Events: created/updated/deleted for the current user's todos."""
+    # Release the connection the auth lookup may hold; the stream can stay open for hours
+    await db.close()
+    return StreamingResponse(
+        open_stream(current_user.id),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/todos/import", response_model=schemas.TodoImportResult, dependencies=[Depends(record_write)])
+async def import_todos(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await services.import_todos(db, request.stream(), current_user.id)
+
+
 @router.get("/todos/{todo_id}", response_model=schemas.TodoResponse)
 async def read_todo(
     todo_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    return services.get_todo_by_id(db, todo_id, current_user.id)
+    # Resolve the todo first: a missing or deleted one is a 404, never a 304
+    todo, version = await services.get_todo_row_with_version(db, todo_id, current_user.id)
+    not_modified = await _not_modified(request, response, db, current_user.id, version)
+    if not_modified:
+        return not_modified
+    return todo
 
 
-@router.put("/todos/{todo_id}", response_model=schemas.TodoResponse)
+@router.put("/todos/{todo_id}", response_model=schemas.TodoResponse, dependencies=[Depends(record_write)])
 async def update_todo(
     todo_id: int,
     todo_update: schemas.TodoUpdate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return services.update_todo(db, todo_id, todo_update, current_user.id)
+    if write_queue.enabled:
+        return await write_queue.update(todo_id, todo_update, current_user.id)
+    return await services.update_todo(db, todo_id, todo_update, current_user.id)
 
 
-@router.delete("/todos/{todo_id}")
+@router.delete("/todos/{todo_id}", dependencies=[Depends(record_write)])
 async def delete_todo(
     todo_id: int,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return services.delete_todo(db, todo_id, current_user.id)
+    if write_queue.enabled:
+        return await write_queue.delete(todo_id, current_user.id)
+    return await services.delete_todo(db, todo_id, current_user.id)
 
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
+from app.config import TODO_BATCH_MAX_ITEMS
 
 
 class UserBase(BaseModel):
@@ -47,6 +48,58 @@ class TodoResponse(TodoBase):
         from_attributes = True
 
 
+TodoSort = Literal["created_at", "updated_at", "title"]
+SortDirection = Literal["asc", "desc"]
+
+
+class TodoStats(BaseModel):
+    total: int
+    completed: int
+    active: int
+
+
+class TodoBatchUpdate(TodoUpdate):
+    id: int
+
+
+class TodoBatchRequest(BaseModel):
+    create: List[TodoCreate] = Field(default_factory=list, max_length=TODO_BATCH_MAX_ITEMS)
+    update: List[TodoBatchUpdate] = Field(default_factory=list, max_length=TODO_BATCH_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=TODO_BATCH_MAX_ITEMS)
+
+
+class TodoBatchItemResult(BaseModel):
+    op: str
+    id: Optional[int] = None
+    status: int
+    detail: Optional[str] = None
+    todo: Optional[TodoResponse] = None
+
+
+class TodoBatchResponse(BaseModel):
+    results: List[TodoBatchItemResult]
+
+
+class TodoImport(TodoBase):
+    completed: bool = False
+    # Kept from an export when present; naive values are taken as UTC
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @field_validator("created_at", "updated_at")
+    @classmethod
+    def as_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None:
+            return value
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+
+class TodoImportResult(BaseModel):
+    imported: int
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
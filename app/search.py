@@ -0,0 +1,171 @@
+"""
+Full-text search over todo titles and descriptions.
+
+SQLite: an external-content FTS5 table (todos_fts) kept in sync with todos by
+triggers. owner_id is indexed as a third column and every MATCH is ANDed with
+the owner's token, so the index only walks that user's postings instead of
+matching across all users and filtering afterwards. PostgreSQL: a GIN index on a tsvector expression, queried with the
+identical expression so the planner can use it. Both are created with the
+todos table and, for existing databases, by ensure_search_index().
+
+Both backends match every term as a prefix, so "bre" finds "bread". Postgres
+stems the document and the terms ("buying" finds "buy"); SQLite does not.
+Other databases get an unindexed, unranked ILIKE scan: every term must still
+appear, but anywhere in a word rather than only at its start.
+"""
+import re
+
+from sqlalchemy import and_, event, func, inspect, literal_column, or_, select, table, column, text
+# Registers the typed to_tsvector/to_tsquery functions before POSTGRES_DOCUMENT is
+# built; otherwise the statement only compiles if the engine happened to load it first
+import sqlalchemy.dialects.postgresql  # noqa: F401
+
+from app import models
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5("
+    "title, description, owner_id, content='todos', content_rowid='id')",
+    # Persistent ranking config: a title hit weighs 10x a description hit; the owner token adds nothing
+    "INSERT INTO todos_fts(todos_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')",
+    "CREATE TRIGGER IF NOT EXISTS todos_fts_ai AFTER INSERT ON todos BEGIN "
+    "INSERT INTO todos_fts(rowid, title, description, owner_id) "
+    "VALUES (new.id, new.title, new.description, new.owner_id); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS todos_fts_ad AFTER DELETE ON todos BEGIN "
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description, owner_id) "
+    "VALUES ('delete', old.id, old.title, old.description, old.owner_id); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS todos_fts_au AFTER UPDATE OF title, description, owner_id ON todos BEGIN "
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description, owner_id) "
+    "VALUES ('delete', old.id, old.title, old.description, old.owner_id); "
+    "INSERT INTO todos_fts(rowid, title, description, owner_id) "
+    "VALUES (new.id, new.title, new.description, new.owner_id); "
+    "END",
+]
+
+# Drops an FTS table from before owner_id was indexed, so it can be rebuilt
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS todos_fts_ai",
+    "DROP TRIGGER IF EXISTS todos_fts_ad",
+    "DROP TRIGGER IF EXISTS todos_fts_au",
+    "DROP TABLE IF EXISTS todos_fts",
+]
+
+# Must match POSTGRES_DOCUMENT below token for token, or the index is not used
+POSTGRES_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_todos_search ON todos USING gin "
+    "(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+
+POSTGRES_DOCUMENT = func.to_tsvector(
+    literal_column("'english'::regconfig"),
+    func.coalesce(models.Todo.title, literal_column("''"))
+    .op("||")(literal_column("' '"))
+    .op("||")(func.coalesce(models.Todo.description, literal_column("''"))),
+)
+
+todos_fts = table("todos_fts", column("rowid"), column("rank"))
+
+
+def _fts_columns(connection):
+    return {row[1] for row in connection.execute(text("PRAGMA table_info(todos_fts)"))}
+
+
+def ensure_search_index(connectable) -> None:
+    """Create the search index if missing; backfills SQLite FTS for existing rows."""
+    with connectable.begin() as connection:
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            existed = inspect(connection).has_table("todos_fts")
+            if existed and "owner_id" not in _fts_columns(connection):
+                for statement in SQLITE_FTS_DROP:
+                    connection.execute(text(statement))
+                existed = False
+            for statement in SQLITE_FTS_DDL:
+                connection.execute(text(statement))
+            if not existed:
+                connection.execute(text("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            connection.execute(text(POSTGRES_SEARCH_DDL))
+
+
+@event.listens_for(models.Todo.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text(POSTGRES_SEARCH_DDL))
+
+
+@event.listens_for(models.Todo.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    # The triggers go with the todos table; the FTS table would be left orphaned
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS todos_fts"))
+
+
+def fts5_query(q: str) -> str:
+    """Quote each term so user input can't inject FTS5 syntax; prefix-match every term."""
+    terms = q.split()
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def fts5_owner_query(owner_id: int, q: str) -> str:
+    """The user's terms, restricted to the text columns and to ``owner_id``'s rows."""
+    return 'owner_id : "{}" AND {{title description}} : ({})'.format(int(owner_id), fts5_query(q))
+
+
+def tsquery_prefix(q: str) -> str:
+    """
+    A to_tsquery() string matching every term as a prefix, like fts5_query.
+
+    Only word characters are kept, quoted as lexemes, so user input can't
+    inject tsquery syntax. A term split by punctuation ("e-mail") becomes a
+    phrase of its parts, as FTS5's tokenizer does.
+    """
+    phrases = []
+    for term in q.split():
+        words = re.findall(r"\w+", term)
+        if words:
+            phrases.append(" <-> ".join("'{}':*".format(word) for word in words))
+    return " & ".join(phrases)
+
+
+def _ilike_terms(q: str):
+    def pattern(term: str) -> str:
+        return "%{}%".format(term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_"))
+
+    return and_(*(
+        or_(
+            models.Todo.title.ilike(pattern(term), escape="\\"),
+            models.Todo.description.ilike(pattern(term), escape="\\"),
+        )
+        for term in q.split()
+    ))
+
+
+def search_todos_query(
+    dialect_name: str, owner_id: int, q: str, limit: int, offset: int, as_rows: bool = False
+):
+    """Ranked, owner-scoped search statement for the given dialect."""
+    entities = models.TODO_COLUMNS if as_rows else (models.Todo,)
+    if dialect_name == "sqlite":
+        query = select(*entities).join(
+            todos_fts, todos_fts.c.rowid == models.Todo.id
+        ).where(
+            literal_column("todos_fts").op("MATCH")(fts5_owner_query(owner_id, q)),
+            models.Todo.owner_id == owner_id,
+        ).order_by(todos_fts.c.rank, models.Todo.id)
+    elif dialect_name == "postgresql":
+        tsquery = func.to_tsquery(literal_column("'english'::regconfig"), tsquery_prefix(q))
+        query = select(*entities).where(
+            POSTGRES_DOCUMENT.op("@@")(tsquery),
+            models.Todo.owner_id == owner_id,
+        ).order_by(func.ts_rank(POSTGRES_DOCUMENT, tsquery).desc(), models.Todo.id)
+    else:
+        query = select(*entities).where(
+            _ilike_terms(q),
+            models.Todo.owner_id == owner_id,
+        ).order_by(models.Todo.id)
+    return query.limit(limit).offset(offset)
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app import models, schemas
 from app.auth import verify_password, get_password_hash
+from app.versioning import bump_todo_list_version
 
 
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
@@ -49,6 +50,7 @@ def get_user_by_id(db: Session, user_id: int) -> models.User:
 def create_todo(db: Session, todo: schemas.TodoCreate, owner_id: int) -> models.Todo:
     db_todo = models.Todo(**todo.model_dump(), owner_id=owner_id)
     db.add(db_todo)
+    db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
     db.commit()
     db.refresh(db_todo)
     return db_todo
@@ -57,7 +59,7 @@ def create_todo(db: Session, todo: schemas.TodoCreate, owner_id: int) -> models.
 def get_todos(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
     return db.query(models.Todo).filter(
         models.Todo.owner_id == owner_id
-    ).offset(skip).limit(limit).all()
+    ).order_by(models.Todo.created_at, models.Todo.id).offset(skip).limit(limit).all()
 
 
 def get_todo_by_id(db: Session, todo_id: int, owner_id: int) -> models.Todo:
@@ -78,6 +80,7 @@ def update_todo(db: Session, todo_id: int, todo_update: schemas.TodoUpdate, owne
     update_data = todo_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(todo, field, value)
+    db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
     db.commit()
     db.refresh(todo)
     return todo
@@ -86,6 +89,7 @@ def update_todo(db: Session, todo_id: int, todo_update: schemas.TodoUpdate, owne
 def delete_todo(db: Session, todo_id: int, owner_id: int):
     todo = get_todo_by_id(db, todo_id, owner_id)
     db.delete(todo)
+    db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
     db.commit()
     return {"message": "Todo deleted successfully"}
 
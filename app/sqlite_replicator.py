@@ -0,0 +1,40 @@
+"""
+Stand-in replicator for local read-replica testing.
+
+Copies a primary SQLite database into a second file with the SQLite online
+backup API, once or on an interval. Point SQLALCHEMY_READ_DATABASE_URL at the
+target file to exercise replica routing (and its lag) without PostgreSQL:
+
+    python -m app.sqlite_replicator todo_app.db todo_app_read.db --interval 1
+"""
+import argparse
+import sqlite3
+import time
+
+
+def replicate_once(source_path: str, target_path: str) -> None:
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="primary SQLite file")
+    parser.add_argument("target", help="replica SQLite file")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="seconds between copies; 0 copies once and exits")
+    args = parser.parse_args(argv)
+
+    replicate_once(args.source, args.target)
+    while args.interval > 0:
+        time.sleep(args.interval)
+        replicate_once(args.source, args.target)
+
+
+if __name__ == "__main__":
+    main()
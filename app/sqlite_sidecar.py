@@ -0,0 +1,45 @@
+"""
+Small local SQLite files that the uvicorn workers on one host share.
+
+The rate limiter's buckets, the read-your-writes timestamps and the change
+feed's notify table all live in such a "sidecar" file next to the app. They
+hold ephemeral state, so the connection is tuned for latency over durability:
+WAL so readers never block the writer, and synchronous=OFF because losing the
+last few entries on a crash is harmless.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+
+def connect(path: str, timeout: float = 1.0) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    return conn
+
+
+class SQLiteSidecar:
+    """
+    One shared connection, serialized by a lock. With ``prune=(table, column)``
+    every ``prune_every``-th use also deletes rows whose ``column`` is older
+    than the ``prune_before`` the caller passes.
+    """
+
+    def __init__(self, path: str, schema: str, prune: Optional[Tuple[str, str]] = None,
+                 prune_every: int = 1000, timeout: float = 1.0):
+        self._conn = connect(path, timeout)
+        self._conn.execute(schema)
+        self._prune_sql = f"DELETE FROM {prune[0]} WHERE {prune[1]} < ?" if prune else None
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    @contextmanager
+    def locked(self, prune_before: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._calls += 1
+            if self._prune_sql and prune_before is not None and self._calls % self.prune_every == 0:
+                self._conn.execute(self._prune_sql, (prune_before,))
+            yield self._conn
@@ -0,0 +1,117 @@
+"""
+Shared Jinja2 environment with rendered-HTML caches.
+
+- Per-todo fragments (``templates/_todo_item.html``) are cached by the todo's
+  id, timestamps and rendered fields, so an unchanged todo is formatted once
+  rather than on every hit of ``/``.
+- Pages that only depend on "nobody is logged in" (login, signup, welcome)
+  are rendered once per process and served as-is.
+- ``stream_template`` sends a page with ``Template.generate()`` so the first
+  bytes go out before the whole todo list has been rendered.
+- ``asset_url`` (see app.assets) resolves static paths to fingerprinted URLs.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+
+from app.assets import asset_url
+from app.config import TEMPLATE_FRAGMENT_CACHE_SIZE, TEMPLATE_PAGE_CACHE, TEMPLATE_STREAM_CHUNK_BYTES
+
+templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML; streamed renders run in the threadpool."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Any:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+fragment_cache = FragmentCache(TEMPLATE_FRAGMENT_CACHE_SIZE)
+_anonymous_pages: Dict[str, str] = {}
+
+
+def _fragment_key(todo) -> tuple:
+    # SQLite stores updated_at to the second, so two edits within one second
+    # share (id, updated_at); the rendered fields disambiguate them.
+    return (todo.id, todo.created_at, todo.updated_at, todo.completed, todo.title, todo.description)
+
+
+def render_todo(todo) -> Markup:
+    """HTML for one todo item, from the fragment cache when unchanged."""
+    key = _fragment_key(todo)
+    html = fragment_cache.get(key)
+    if html is None:
+        html = Markup(templates.get_template("_todo_item.html").render(todo=todo))
+        fragment_cache.put(key, html)
+    return html
+
+
+templates.env.globals["render_todo"] = render_todo
+
+
+def render_anonymous(name: str) -> str:
+    """Render ``name`` for a logged-out visitor, once per process."""
+    html = _anonymous_pages.get(name)
+    if html is None:
+        html = templates.get_template(name).render(current_user=None)
+        if TEMPLATE_PAGE_CACHE:
+            _anonymous_pages[name] = html
+    return html
+
+
+def clear_caches() -> None:
+    fragment_cache.clear()
+    _anonymous_pages.clear()
+
+
+def _buffered(chunks: Iterable[str], size: int) -> Iterator[str]:
+    # generate() yields many tiny strings; coalesce them so each send is worth it
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_template(name: str, context: Dict[str, Any]) -> StreamingResponse:
+    """Stream ``name`` rendered with ``context`` instead of building the whole body first."""
+    template = templates.get_template(name)
+    return StreamingResponse(
+        _buffered(template.generate(context), TEMPLATE_STREAM_CHUNK_BYTES),
+        media_type="text/html",
+    )
@@ -0,0 +1,47 @@
+"""
+Per-user todo list versions and the ETags derived from them.
+
+Every mutation of a user's todos bumps ``todo_list_versions.version`` in the
+same transaction, so a list or item representation can be revalidated by
+reading one small row instead of the todos themselves.
+"""
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import models
+
+_UPSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def bump_todo_list_version(dialect_name: str, owner_id: int):
+    """Statement that increments the owner's version, creating it at 1 if missing."""
+    stmt = _UPSERTS[dialect_name](models.TodoListVersion).values(owner_id=owner_id, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.TodoListVersion.owner_id],
+        set_={"version": models.TodoListVersion.version + 1},
+    )
+
+
+def todo_list_version_query(owner_id: int):
+    return select(models.TodoListVersion.version).where(
+        models.TodoListVersion.owner_id == owner_id
+    )
+
+
+def make_etag(owner_id: int, version: Optional[int]) -> str:
+    return f'"{owner_id}.{version or 0}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
@@ -0,0 +1,225 @@
+"""
+Optional group-commit queue for todo mutations on SQLite.
+
+On SQLite every commit is an fsync and writers from all workers serialize on
+the database lock, so a burst of checkbox toggles queues up one commit at a
+time. With WRITE_QUEUE_ENABLED, the mutation routes hand their operation to
+``write_queue`` instead: a single writer task per process collects operations
+for up to WRITE_QUEUE_MAX_DELAY_MS (or WRITE_QUEUE_MAX_BATCH operations) and
+applies them in one transaction, and each request awaits its own result.
+
+- Operations are applied in arrival order, so per-user ordering holds.
+- Consecutive updates to the same todo within a batch are collapsed into one
+  UPDATE; every collapsed request receives the final row.
+- Each owner's list version is bumped once per batch.
+- A per-operation miss (404) only fails that operation. If the transaction
+  itself fails, the batch is retried one operation per transaction so one bad
+  write cannot fail its neighbours.
+- The writer runs in an empty context, and the statements of each operation
+  are counted separately and added to the query stats of the request that
+  submitted it (the metrics and query budgets see them there). An owner's
+  version bump is charged to the first operation that changed the owner's
+  list, and a collapsed update to the first request that asked for it.
+"""
+import asyncio
+import contextvars
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app import async_services, schemas
+from app.database import AsyncSessionLocal, async_engine
+from app.events import publish_change
+from app.instrumentation import QueryStats, current_query_stats, track_queries
+from app.config import WRITE_QUEUE_ENABLED, WRITE_QUEUE_MAX_BATCH, WRITE_QUEUE_MAX_DELAY_MS
+from app.versioning import bump_todo_list_version
+
+logger = logging.getLogger(__name__)
+
+DELETED = {"message": "Todo deleted successfully"}
+
+
+@dataclass
+class _Op:
+    kind: str  # "create" | "update" | "delete"
+    owner_id: int
+    todo_id: Optional[int]
+    values: Dict[str, Any]
+    futures: List[asyncio.Future] = field(default_factory=list)
+    # Query stats of the submitting requests, parallel to ``futures``
+    callers: List[Optional[QueryStats]] = field(default_factory=list)
+    queries: QueryStats = field(default_factory=QueryStats)
+
+
+class WriteQueue:
+    def __init__(self, session_factory, max_batch: int = WRITE_QUEUE_MAX_BATCH,
+                 max_delay_ms: float = WRITE_QUEUE_MAX_DELAY_MS, enabled: bool = True):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.enabled = enabled
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------------------------------------------------------------- submit
+
+    async def _submit(self, op: _Op):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            # A fresh context: the writer outlives this request and must not
+            # count every later statement into its query stats
+            self._task = asyncio.create_task(
+                self._run(), name="todo-write-queue", context=contextvars.Context()
+            )
+        future = loop.create_future()
+        op.futures.append(future)
+        op.callers.append(current_query_stats())
+        self._queue.put_nowait(op)
+        return await future
+
+    async def create(self, todo: schemas.TodoCreate, owner_id: int):
+        return await self._submit(_Op("create", owner_id, None, todo.model_dump()))
+
+    async def update(self, todo_id: int, todo_update: schemas.TodoUpdate, owner_id: int):
+        return await self._submit(_Op("update", owner_id, todo_id, todo_update.model_dump(exclude_unset=True)))
+
+    async def delete(self, todo_id: int, owner_id: int):
+        return await self._submit(_Op("delete", owner_id, todo_id, {}))
+
+    # ---------------------------------------------------------------- writer
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    op = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if op is None:  # close(): flush what we have, then stop
+                    stopping = True
+                    break
+                batch.append(op)
+            try:
+                await self._flush(batch)
+            except Exception as exc:  # never let the writer die with requests waiting
+                logger.exception("Write queue flush failed")
+                for op in batch:
+                    _report_queries(op)
+                    _resolve(op, exc)
+
+    @staticmethod
+    def collapse(batch: List[_Op]) -> List[_Op]:
+        """Merge each update into the previous one on the same todo, if that was an update."""
+        ops, last = [], {}
+        for op in batch:
+            key = (op.owner_id, op.todo_id)
+            previous = last.get(key) if op.todo_id is not None else None
+            if op.kind == "update" and previous is not None and previous.kind == "update":
+                previous.values.update(op.values)
+                previous.futures.extend(op.futures)
+                previous.callers.extend(op.callers)
+                continue
+            ops.append(op)
+            if op.todo_id is not None:
+                last[key] = op
+        return ops
+
+    async def _apply(self, db, op: _Op):
+        """Run one operation without committing; the result, or the HTTPException it maps to."""
+        if op.kind == "create":
+            return await async_services.insert_todo_row(db, op.values, op.owner_id)
+        if op.kind == "update":
+            if not op.values:
+                try:
+                    return await async_services.get_todo_row(db, op.todo_id, op.owner_id)
+                except HTTPException as exc:
+                    return exc
+            row = await async_services.update_todo_row(db, op.todo_id, op.values, op.owner_id)
+            return row if row is not None else async_services.todo_not_found()
+        deleted = await async_services.delete_todo_row(db, op.todo_id, op.owner_id)
+        return DELETED if deleted else async_services.todo_not_found()
+
+    async def _commit(self, ops: List[_Op]) -> list:
+        async with self.session_factory() as db:
+            results = []
+            for op in ops:
+                with track_queries(op.queries):
+                    results.append(await self._apply(db, op))
+            changed: Dict[int, _Op] = {}
+            for op, result in zip(ops, results):
+                if not isinstance(result, Exception) and not (op.kind == "update" and not op.values):
+                    changed.setdefault(op.owner_id, op)
+            for owner_id in sorted(changed):
+                with track_queries(changed[owner_id].queries):
+                    await db.execute(bump_todo_list_version(db.bind.dialect.name, owner_id))
+            await db.commit()
+            return results
+
+    async def _flush(self, batch: List[_Op]) -> None:
+        ops = self.collapse(batch)
+        try:
+            results = await self._commit(ops)
+        except Exception:
+            if len(ops) == 1:
+                raise
+            logger.warning("Group commit of %d writes failed; retrying one by one", len(ops), exc_info=True)
+            results = []
+            for op in ops:
+                try:
+                    results.extend(await self._commit([op]))
+                except Exception as exc:
+                    results.append(exc)
+        for op, result in zip(ops, results):
+            _report_queries(op)
+            _resolve(op, result)
+            if isinstance(result, Exception) or (op.kind == "update" and not op.values):
+                continue
+            if op.kind == "delete":
+                publish_change("deleted", op.owner_id, todo_id=op.todo_id)
+            else:
+                publish_change("created" if op.kind == "create" else "updated", op.owner_id, result)
+
+    async def close(self) -> None:
+        """Let queued writes finish, then stop the writer."""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+
+def _report_queries(op: _Op) -> None:
+    """Hand the operation's statements to the first request that submitted it."""
+    caller = op.callers[0] if op.callers else None
+    if caller is not None:
+        caller.merge(op.queries)
+    op.queries = QueryStats()
+
+
+def _resolve(op: _Op, result) -> None:
+    for future in op.futures:
+        if future.done():
+            continue
+        if isinstance(result, BaseException):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+# Group commit only pays off where commits serialize on one file lock
+write_queue = WriteQueue(
+    AsyncSessionLocal, enabled=WRITE_QUEUE_ENABLED and async_engine.dialect.name == "sqlite"
+)
@@ -0,0 +1,296 @@
+"""
+Microbenchmarks for the service, auth and serialization hot paths.
+
+Runs against throwaway SQLite databases in a temp directory, seeded with one
+user owning 10 / 1k / 100k todos. Each case is timed over repeated calls and
+summarised as per-call median and min; the read paths also report memory per
+row loaded (retained and peak, via tracemalloc). Full-text search is timed
+separately on a table shared by many owners (``--search-rows``), which is
+where an index that is not scoped by owner falls over. Results can be saved as a JSON baseline
+and later runs compared against it:
+
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 15
+
+A comparison exits non-zero if any case's median got slower than the baseline
+by more than ``--threshold`` percent.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import async_services, auth, models, schemas, services, templating
+from app.responses import FastJSONResponse, rows_to_dicts
+from app.database import Base, build_async_engine, build_engine
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+SEARCH_OWNERS = 100
+TODO_LIST = TypeAdapter(List[schemas.TodoResponse])
+
+
+def measure(fn: Callable[[], object], min_time: float, min_runs: int = 5) -> Dict[str, float]:
+    """Call ``fn`` repeatedly for at least ``min_time`` seconds; per-call stats in seconds."""
+    fn()  # warm-up: caches, prepared statements, lazy imports
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "runs": len(timings),
+    }
+
+
+def measure_memory(load: Callable[[], list]) -> Dict[str, float]:
+    """Bytes per returned row: still held by the result, and at the peak while loading."""
+    load()  # warm-up, so compiled-statement caches are not counted
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = load()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    count = max(len(result), 1)
+    return {
+        "retained_bytes_per_row": (current - before) / count,
+        "peak_bytes_per_row": (peak - before) / count,
+        "rows": len(result),
+    }
+
+
+def seed(path: Path, rows: int):
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{
+            "id": 1, "username": "bench", "email": "bench@example.com",
+            "hashed_password": auth.get_password_hash("bench"),
+        }])
+        for start in range(0, rows, 10_000):
+            conn.execute(insert(models.Todo), [
+                {"title": f"Todo {i}", "description": f"Description for todo {i}",
+                 "completed": i % 3 == 0, "owner_id": 1}
+                for i in range(start, min(start + 10_000, rows))
+            ])
+    return engine
+
+
+def run_cases(rows: int, workdir: Path, min_time: float) -> Dict[str, Dict[str, float]]:
+    engine = seed(workdir / f"bench_{rows}.db", rows)
+    async_engine = build_async_engine(f"sqlite:///{workdir / f'bench_{rows}.db'}")
+    Session = sessionmaker(bind=engine, autoflush=False)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    loop = asyncio.new_event_loop()
+    results = {}
+
+    def run_async(factory):
+        async def call():
+            async with AsyncSession() as db:
+                return await factory(db)
+        return lambda: loop.run_until_complete(call())
+
+    sync_db = Session()
+    token = auth.create_access_token({"sub": "bench"})
+    page = loop.run_until_complete(AsyncSession().__aenter__())
+    todos_page = loop.run_until_complete(async_services.get_todos(page, 1, limit=100))
+    todos_1k = loop.run_until_complete(async_services.get_todos(page, 1, limit=1000))
+    rows_page = loop.run_until_complete(async_services.get_todos(page, 1, limit=100, as_rows=True))
+    rows_1k = loop.run_until_complete(async_services.get_todos(page, 1, limit=1000, as_rows=True))
+    fast_json = FastJSONResponse.render
+    target_id = todos_page[0].id if todos_page else None
+    index = templating.templates.get_template("index.html")
+    user = sync_db.get(models.User, 1)
+
+    cases = {
+        "services.get_todos[sync,limit=100]": lambda: services.get_todos(sync_db, 1),
+        "async_services.get_todos[limit=100]": run_async(lambda db: async_services.get_todos(db, 1)),
+        "async_services.get_todos[skip=rows-100]": run_async(
+            lambda db: async_services.get_todos(db, 1, skip=max(rows - 100, 0))
+        ),
+        "async_services.get_todos_page[limit=100]": run_async(
+            lambda db: async_services.get_todos_page(db, 1, limit=100)
+        ),
+        "async_services.get_todo_stats": run_async(lambda db: async_services.get_todo_stats(db, 1)),
+        "auth.decode_token": lambda: auth.decode_token(token),
+        "auth.resolve_user[cold]": run_async(
+            lambda db: (auth.principal_cache.clear(), auth._resolve_user(db, token))[1]
+        ),
+        "auth.resolve_user[cached]": run_async(lambda db: auth._resolve_user(db, token)),
+        "TodoResponse.serialize[100]": lambda: TODO_LIST.dump_json(TODO_LIST.validate_python(todos_page)),
+        "TodoResponse.serialize[1000]": lambda: TODO_LIST.dump_json(TODO_LIST.validate_python(todos_1k)),
+        "async_services.get_todos[rows,limit=100]": run_async(
+            lambda db: async_services.get_todos(db, 1, as_rows=True)
+        ),
+        "FastJSONResponse.render[100]": lambda: fast_json(None, rows_to_dicts(rows_page)),
+        "FastJSONResponse.render[1000]": lambda: fast_json(None, rows_to_dicts(rows_1k)),
+        "index.html.render[100,cold]": lambda: (
+            templating.fragment_cache.clear(), index.render(current_user=user, todos=todos_page)
+        ),
+        "index.html.render[100,cached]": lambda: index.render(current_user=user, todos=todos_page),
+    }
+    memory_cases = {
+        "memory.get_todos[orm,limit=1000]": run_async(lambda db: async_services.get_todos(db, 1, limit=1000)),
+        "memory.get_todos[rows,limit=1000]": run_async(
+            lambda db: async_services.get_todos(db, 1, limit=1000, as_rows=True)
+        ),
+    }
+    # These write to the seeded table, so they run after every read case has
+    # seen exactly ``rows`` todos
+    mutating_cases = {
+        "async_services.create_todo": run_async(
+            lambda db: async_services.create_todo(db, schemas.TodoCreate(title="bench"), 1)
+        ),
+        "async_services.update_todo": run_async(
+            lambda db: async_services.update_todo(db, target_id, schemas.TodoUpdate(completed=True), 1)
+        ),
+    }
+    try:
+        for name, fn in cases.items():
+            results[name] = measure(fn, min_time)
+        for name, fn in memory_cases.items():
+            results[name] = measure_memory(fn)
+            # Every memory case loads up to 1000 of the seeded todos
+            if results[name]["rows"] != min(rows, 1000):
+                raise RuntimeError(
+                    f"{name} loaded {results[name]['rows']} rows from a table seeded with {rows}; "
+                    "a case that writes to it ran first"
+                )
+        for name, fn in mutating_cases.items():
+            if target_id is None and "update_todo" in name:
+                continue
+            results[name] = measure(fn, min_time)
+    finally:
+        sync_db.close()
+        loop.run_until_complete(page.close())
+        loop.run_until_complete(async_engine.dispose())
+        loop.close()
+        engine.dispose()
+        auth.principal_cache.clear()
+    return results
+
+
+def run_search_cases(rows: int, workdir: Path, min_time: float) -> Dict[str, Dict[str, float]]:
+    """Search as one of SEARCH_OWNERS users who share ``rows`` todos with the same vocabulary."""
+    path = workdir / f"search_{rows}.db"
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": owner, "username": f"bench{owner}", "email": f"bench{owner}@example.com", "hashed_password": "x"}
+            for owner in range(1, SEARCH_OWNERS + 1)
+        ])
+        for start in range(0, rows, 10_000):
+            conn.execute(insert(models.Todo), [
+                {"title": f"Buy milk {i}", "description": f"Errand number {i}",
+                 "owner_id": i % SEARCH_OWNERS + 1}
+                for i in range(start, min(start + 10_000, rows))
+            ])
+    engine.dispose()
+    async_engine = build_async_engine(f"sqlite:///{path}")
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    loop = asyncio.new_event_loop()
+
+    def search(q: str):
+        async def call():
+            async with AsyncSession() as db:
+                return await async_services.search_todos(db, 1, q, as_rows=True)
+        return lambda: loop.run_until_complete(call())
+
+    try:
+        return {
+            f"async_services.search_todos[{SEARCH_OWNERS} owners,q=milk]": measure(search("milk"), min_time),
+            f"async_services.search_todos[{SEARCH_OWNERS} owners,q=err mi]": measure(search("err mi"), min_time),
+        }
+    finally:
+        loop.run_until_complete(async_engine.dispose())
+        loop.close()
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    for key, stats in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if before is None or "median" not in stats:
+            continue
+        change = (stats["median"] - before["median"]) / before["median"] * 100
+        if change > threshold:
+            regressions.append(
+                f"{key}: {before['median'] * 1e6:.1f}us -> {stats['median'] * 1e6:.1f}us (+{change:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the todo-app microbenchmarks")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated todo counts to seed (default: %(default)s)")
+    parser.add_argument("--search-rows", type=int, default=100_000,
+                        help="todos shared by %d owners for the search cases; 0 skips them "
+                             "(default: %%(default)s)" % SEARCH_OWNERS)
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds to spend timing each case (default: %(default)s)")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent slowdown of the median that counts as a regression")
+    args = parser.parse_args(argv)
+    # Seeding and the large-table cases trip the slow-query log by design
+    logging.getLogger("app.sql").setLevel(logging.ERROR)
+
+    current = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="todo-bench-") as tmp:
+        runs = [(rows, run_cases) for rows in (int(s) for s in args.sizes.split(","))]
+        if args.search_rows:
+            runs.append((args.search_rows, run_search_cases))
+        for rows, run in runs:
+            for name, stats in run(rows, Path(tmp), args.min_time).items():
+                key = f"{name}@{rows}"
+                current["results"][key] = stats
+                if "median" in stats:
+                    print(f"{key:<55} median {stats['median'] * 1e6:>10.1f}us  "
+                          f"min {stats['min'] * 1e6:>10.1f}us  ({stats['runs']} runs)")
+                else:
+                    print(f"{key:<55} retained {stats['retained_bytes_per_row']:>8.0f}B/row  "
+                          f"peak {stats['peak_bytes_per_row']:>8.0f}B/row  ({stats['rows']} rows)")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(current, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.baseline:
+        regressions = compare(current, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0f}%:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0f}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
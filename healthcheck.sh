@@ -2,7 +2,7 @@
 # Health check script for Kubernetes liveness and readiness probes
 
 # Check if the application is responding
-if curl -f http://localhost:8000/health 2>/dev/null >/dev/null; then
+if curl -f http://localhost:8000/livez 2>/dev/null >/dev/null; then
     exit 0
 fi
 
@@ -39,43 +39,48 @@ async function apiCall(url, options = {}) {
     return response.json();
 }
 
-// Load todos on page load
-document.addEventListener('DOMContentLoaded', async () => {
-    await loadTodos();
-    
+// The list is rendered server-side in index.html, so there is nothing to fetch
+// on load. Listeners are delegated from the list container, which means items
+// added or replaced later need no rebinding.
+document.addEventListener('DOMContentLoaded', () => {
     // Form submission
     const form = document.getElementById('todo-form');
     if (form) {
         form.addEventListener('submit', handleCreateTodo);
     }
     
-    // Checkbox changes
-    document.querySelectorAll('.todo-checkbox').forEach(checkbox => {
-        checkbox.addEventListener('change', handleToggleTodo);
-    });
-    
-    // Delete buttons
-    document.querySelectorAll('.delete-btn').forEach(btn => {
-        btn.addEventListener('click', handleDeleteTodo);
-    });
+    const todosList = document.getElementById('todos-list');
+    if (todosList) {
+        // Checkbox changes
+        todosList.addEventListener('change', e => {
+            if (e.target.matches('.todo-checkbox')) handleToggleTodo(e);
+        });
+        // Delete buttons
+        todosList.addEventListener('click', e => {
+            if (e.target.matches('.delete-btn')) handleDeleteTodo(e);
+        });
+        subscribeToChanges();
+    }
 });
 
-// Load todos from API
-async function loadTodos() {
-    try {
-        const todos = await apiCall('/todos');
-        renderTodos(todos);
-    } catch (error) {
-        console.error('Error loading todos:', error);
-    }
+// Apply changes made in other tabs and devices as they happen
+function subscribeToChanges() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/todos/events');
+    source.addEventListener('created', e => upsertTodoItem(JSON.parse(e.data).todo));
+    source.addEventListener('updated', e => upsertTodoItem(JSON.parse(e.data).todo));
+    source.addEventListener('deleted', e => {
+        const item = document.querySelector(`.todo-item[data-id="${JSON.parse(e.data).id}"]`);
+        if (item) item.remove();
+    });
+    // Sent after bulk changes, or when this tab fell behind and missed events
+    source.addEventListener('resync', () => window.location.reload());
 }
 
-// Render todos to the page
-function renderTodos(todos) {
-    const todosList = document.getElementById('todos-list');
-    if (!todosList) return;
-    
-    todosList.innerHTML = todos.map(todo => `
+// Build the DOM node for one todo; mirrors templates/_todo_item.html
+function renderTodoItem(todo) {
+    const template = document.createElement('template');
+    template.innerHTML = `
         <div class="todo-item" data-id="${todo.id}">
             <div class="todo-header">
                 <input type="checkbox" class="todo-checkbox" ${todo.completed ? 'checked' : ''} data-id="${todo.id}">
@@ -85,16 +90,20 @@ function renderTodos(todos) {
             ${todo.description ? `<p class="todo-description ${todo.completed ? 'completed' : ''}">${escapeHtml(todo.description)}</p>` : ''}
             <small class="todo-date">${formatDate(todo.created_at)}</small>
         </div>
-    `).join('');
-    
-    // Reattach event listeners
-    document.querySelectorAll('.todo-checkbox').forEach(checkbox => {
-        checkbox.addEventListener('change', handleToggleTodo);
-    });
-    
-    document.querySelectorAll('.delete-btn').forEach(btn => {
-        btn.addEventListener('click', handleDeleteTodo);
-    });
+    `.trim();
+    return template.content.firstElementChild;
+}
+
+// Replace one item in place with the server's version of it, or append it if
+// it is new. The change feed may deliver our own writes before or after the
+// API response does, so both paths go through here.
+function upsertTodoItem(todo) {
+    const existing = document.querySelector(`.todo-item[data-id="${todo.id}"]`);
+    if (existing) {
+        existing.replaceWith(renderTodoItem(todo));
+    } else {
+        document.getElementById('todos-list').appendChild(renderTodoItem(todo));
+    }
 }
 
 // Handle create todo
@@ -113,7 +122,7 @@ async function handleCreateTodo(e) {
     }
     
     try {
-        await apiCall('/todos', {
+        const todo = await apiCall('/todos', {
             method: 'POST',
             body: JSON.stringify({
                 title,
@@ -125,8 +134,8 @@ async function handleCreateTodo(e) {
         titleInput.value = '';
         descriptionInput.value = '';
         
-        // Reload todos
-        await loadTodos();
+        // Append the new todo; the list is ordered oldest first
+        upsertTodoItem(todo);
     } catch (error) {
         console.error('Error creating todo:', error);
         alert('Failed to create todo. Please try again.');
@@ -139,7 +148,7 @@ async function handleToggleTodo(e) {
     const isCompleted = e.target.checked;
     
     try {
-        await apiCall(`/todos/${todoId}`, {
+        const todo = await apiCall(`/todos/${todoId}`, {
             method: 'PUT',
             body: JSON.stringify({
                 completed: isCompleted
@@ -147,17 +156,7 @@ async function handleToggleTodo(e) {
         });
         
         // Update UI
-        const todoItem = e.target.closest('.todo-item');
-        const title = todoItem.querySelector('.todo-title');
-        const description = todoItem.querySelector('.todo-description');
-        
-        if (isCompleted) {
-            title.classList.add('completed');
-            if (description) description.classList.add('completed');
-        } else {
-            title.classList.remove('completed');
-            if (description) description.classList.remove('completed');
-        }
+        upsertTodoItem(todo);
     } catch (error) {
         console.error('Error updating todo:', error);
         // Revert checkbox
@@ -179,9 +178,9 @@ async function handleDeleteTodo(e) {
             method: 'DELETE'
         });
         
-        // Remove from UI
+        // Remove from UI (the change feed may already have done so)
         const todoItem = e.target.closest('.todo-item');
-        todoItem.remove();
+        if (todoItem) todoItem.remove();
     } catch (error) {
         console.error('Error deleting todo:', error);
         alert('Failed to delete todo. Please try again.');
@@ -196,13 +195,6 @@ function escapeHtml(text) {
 }
 
 function formatDate(dateString) {
-    const date = new Date(dateString);
-    return date.toLocaleString('en-US', {
-        year: 'numeric',
-        month: '2-digit',
-        day: '2-digit',
-        hour: '2-digit',
-        minute: '2-digit'
-    });
+    // Same "YYYY-MM-DD HH:MM" as the server-rendered items (strftime in index.html)
+    return dateString.slice(0, 16).replace('T', ' ');
 }
-
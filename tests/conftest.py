@@ -1,19 +1,29 @@
 # tests/conftest.py
 import os, sys, time, socket, subprocess, urllib.request
 import pytest
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from starlette.testclient import TestClient
 
-from app.database import Base, get_db
+from app.auth import principal_cache
+from app.instrumentation import normalize_sql, request_listeners
+from app.database import Base, get_db, get_async_db, build_engine, build_async_engine
 from app.main import app
+from app.ratelimit import rate_limiter
 
 # -------------------------- DB / API client (unit/integration) --------------------------
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_todo_app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Same file through aiosqlite for the async routes. NullPool: TestClient runs the
+# app on its own event loop per client, so pooled connections must not outlive it.
+async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 class NoRedirectClient(TestClient):
     # Make sure tests see 303 instead of following to 200
     def __init__(self, app, base_url="http://testserver", **kwargs):
@@ -46,6 +56,13 @@ def db_session():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # drop_all bypasses the ORM delete events, so forget cached users explicitly
+        principal_cache.clear()
+
+@pytest.fixture(scope="function")
+async def async_db_session(db_session):
+    async with TestingAsyncSessionLocal() as db:
+        yield db
 
 @pytest.fixture(scope="function")
 def client(db_session):
@@ -55,12 +72,50 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    rate_limiter.reset()
     try:
         yield NoRedirectClient(app)
     finally:
         app.dependency_overrides.clear()
 
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test if any request made inside the block issues more SQL statements
+    than its budget:
+
+        with query_budget(2):
+            client.get("/todos", headers=headers)
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        seen = []
+
+        def listener(method, route, status, stats):
+            seen.append((method, route, stats))
+
+        request_listeners.append(listener)
+        try:
+            yield seen
+        finally:
+            request_listeners.remove(listener)
+        over = [(method, route, stats) for method, route, stats in seen if stats.count > max_queries]
+        if over:
+            report = "\n".join(
+                f"{method} {route}: {stats.count} queries\n    "
+                + "\n    ".join(normalize_sql(sql) for sql in stats.statements)
+                for method, route, stats in over
+            )
+            pytest.fail(f"Query budget of {max_queries} exceeded:\n{report}")
+
+    return budget
+
 # -------------------------- Live server for Playwright e2e --------------------------
 
 def _free_port() -> int:
@@ -0,0 +1,81 @@
+import gzip
+import json
+
+import brotli
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import assets
+
+CSS = b"body { color: #333; }\n" * 200
+
+
+def _static_tree(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_bytes(CSS)
+    (tmp_path / "img.png").write_bytes(b"\x89PNG not really")
+    return tmp_path
+
+
+def test_build_fingerprints_and_precompresses(tmp_path):
+    static = _static_tree(tmp_path)
+    manifest = assets.build(static)
+
+    built = manifest["css/style.css"]
+    assert built == f"dist/css/{assets.fingerprint('style.css', CSS)}"
+    assert (static / built).read_bytes() == CSS
+    assert gzip.decompress((static / f"{built}.gz").read_bytes()) == CSS
+    assert brotli.decompress((static / f"{built}.br").read_bytes()) == CSS
+    # Binary formats are fingerprinted but not recompressed
+    assert not (static / f"{manifest['img.png']}.gz").exists()
+    assert json.loads((static / "dist" / "manifest.json").read_text()) == manifest
+
+    # Rebuilding replaces the previous output instead of piling up old hashes
+    (static / "css" / "style.css").write_bytes(b"body{}")
+    assets.build(static)
+    assert not (static / built).exists()
+
+
+def test_accepted_encodings():
+    assert assets.accepted_encodings("gzip, deflate, br") == ["br", "gzip"]
+    assert assets.accepted_encodings("gzip;q=1.0, br;q=0") == ["gzip"]
+    assert assets.accepted_encodings("identity") == []
+    assert assets.accepted_encodings("*") == ["br", "gzip"]
+
+
+def test_precompressed_static_files(tmp_path):
+    static = _static_tree(tmp_path)
+    url = "/static/" + assets.build(static)["css/style.css"]
+    app = FastAPI()
+    app.mount("/static", assets.PrecompressedStaticFiles(directory=static), name="static")
+    client = TestClient(app)
+
+    for accept, encoding in (("gzip, br", "br"), ("gzip", "gzip"), ("identity", None)):
+        response = client.get(url, headers={"Accept-Encoding": accept})
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") == encoding
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.headers["cache-control"] == assets.IMMUTABLE_CACHE_CONTROL
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.content == CSS
+
+    etag = client.get(url, headers={"Accept-Encoding": "br"}).headers["etag"]
+    assert client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": etag}).status_code == 304
+
+    # Unbuilt paths are ordinary static files
+    plain = client.get("/static/css/style.css", headers={"Accept-Encoding": "br"})
+    assert "content-encoding" not in plain.headers
+    assert "immutable" not in plain.headers.get("cache-control", "")
+
+
+def test_asset_url_uses_manifest(tmp_path, monkeypatch):
+    static = _static_tree(tmp_path)
+    monkeypatch.setattr(assets, "STATIC_DIR", static)
+    assets.load_manifest.cache_clear()
+    try:
+        assert assets.asset_url("css/style.css") == "/static/css/style.css"
+        assets.load_manifest.cache_clear()
+        built = assets.build(static)["css/style.css"]
+        assert assets.asset_url("css/style.css") == f"/static/{built}"
+    finally:
+        assets.load_manifest.cache_clear()
@@ -0,0 +1,185 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import async_services, models, schemas
+
+
+async def _make_user(db: AsyncSession, username: str = "testuser"):
+    return await async_services.create_user(
+        db,
+        schemas.UserCreate(
+            username=username,
+            email=f"{username}@example.com",
+            password="testpass123"
+        )
+    )
+
+
+async def test_create_and_authenticate_user(async_db_session: AsyncSession):
+    user = await _make_user(async_db_session)
+    assert user.id is not None
+
+    authenticated = await async_services.authenticate_user(async_db_session, "testuser", "testpass123")
+    assert authenticated is not None
+    assert authenticated.id == user.id
+
+    assert await async_services.authenticate_user(async_db_session, "testuser", "wrongpass") is None
+    assert await async_services.authenticate_user(async_db_session, "wronguser", "testpass123") is None
+
+
+async def test_create_user_duplicate_username(async_db_session: AsyncSession):
+    await _make_user(async_db_session)
+    with pytest.raises(HTTPException):
+        await _make_user(async_db_session)
+
+
+async def test_todo_lifecycle(async_db_session: AsyncSession):
+    user = await _make_user(async_db_session)
+
+    todo = await async_services.create_todo(
+        async_db_session, schemas.TodoCreate(title="Test Todo", description="Desc"), user.id
+    )
+    assert todo.owner_id == user.id
+    assert todo.completed is False
+    assert todo.created_at is not None
+
+    updated = await async_services.update_todo(
+        async_db_session, todo.id, schemas.TodoUpdate(completed=True), user.id
+    )
+    assert updated.completed is True
+    assert updated.title == "Test Todo"
+
+    todos = await async_services.get_todos(async_db_session, user.id)
+    assert [t.id for t in todos] == [todo.id]
+
+    result = await async_services.delete_todo(async_db_session, todo.id, user.id)
+    assert result["message"] == "Todo deleted successfully"
+    with pytest.raises(HTTPException) as exc:
+        await async_services.get_todo_by_id(async_db_session, todo.id, user.id)
+    assert exc.value.status_code == 404
+
+
+async def test_todos_scoped_to_owner(async_db_session: AsyncSession):
+    alice = await _make_user(async_db_session, "alice")
+    bob = await _make_user(async_db_session, "bob")
+    todo = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Mine"), alice.id)
+
+    assert await async_services.get_todos(async_db_session, bob.id) == []
+    with pytest.raises(HTTPException):
+        await async_services.get_todo_by_id(async_db_session, todo.id, bob.id)
+
+
+async def test_get_todos_page_walks_all_rows_in_order(async_db_session: AsyncSession):
+    user = await _make_user(async_db_session)
+    created = [
+        await async_services.create_todo(async_db_session, schemas.TodoCreate(title=f"Todo {i}"), user.id)
+        for i in range(7)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await async_services.get_todos_page(async_db_session, user.id, limit=3, cursor=cursor)
+        seen.extend(t.id for t in page)
+        if cursor is None:
+            break
+    assert seen == [t.id for t in created]
+
+
+async def test_get_todos_page_rejects_garbage_cursor(async_db_session: AsyncSession):
+    user = await _make_user(async_db_session)
+    with pytest.raises(HTTPException) as exc:
+        await async_services.get_todos_page(async_db_session, user.id, cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+async def test_batch_todos_applies_all_operations(async_db_session: AsyncSession):
+    alice = await _make_user(async_db_session, "alice")
+    bob = await _make_user(async_db_session, "bob")
+    keep = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Keep"), alice.id)
+    drop = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Drop"), alice.id)
+    foreign = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Bob's"), bob.id)
+
+    response = await async_services.batch_todos(
+        async_db_session,
+        schemas.TodoBatchRequest(
+            create=[schemas.TodoCreate(title="New 1"), schemas.TodoCreate(title="New 2")],
+            update=[
+                schemas.TodoBatchUpdate(id=keep.id, completed=True),
+                schemas.TodoBatchUpdate(id=foreign.id, title="Hijacked"),
+            ],
+            delete=[drop.id, foreign.id],
+        ),
+        alice.id,
+    )
+
+    summary = [(r.op, r.status) for r in response.results]
+    assert summary == [
+        ("create", 200), ("create", 200),
+        ("update", 200), ("update", 404),
+        ("delete", 200), ("delete", 404),
+    ]
+    assert [r.todo.title for r in response.results[:2]] == ["New 1", "New 2"]
+    assert response.results[2].todo.completed is True
+    assert response.results[2].todo.title == "Keep"
+
+    titles = sorted(t.title for t in await async_services.get_todos(async_db_session, alice.id))
+    assert titles == ["Keep", "New 1", "New 2"]
+    untouched = await async_services.get_todo_by_id(async_db_session, foreign.id, bob.id)
+    assert untouched.title == "Bob's"
+
+
+async def test_get_todos_filter_sort_and_stats(async_db_session: AsyncSession):
+    user = await _make_user(async_db_session)
+    for title in ["b", "d", "a", "e", "c"]:
+        await async_services.create_todo(async_db_session, schemas.TodoCreate(title=title), user.id)
+    # Backdate creation so the edits below are strictly newer at second precision
+    await async_db_session.execute(update(models.Todo).values(created_at=datetime(2000, 1, 1), updated_at=None))
+    await async_db_session.commit()
+    todos = await async_services.get_todos(async_db_session, user.id, sort="title")
+    for todo in todos[:2]:  # a, b
+        await async_services.update_todo(async_db_session, todo.id, schemas.TodoUpdate(completed=True), user.id)
+
+    active = await async_services.get_todos(async_db_session, user.id, completed=False, sort="title", direction="desc")
+    assert [t.title for t in active] == ["e", "d", "c"]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await async_services.get_todos_page(
+            async_db_session, user.id, limit=2, cursor=cursor, sort="title", direction="desc"
+        )
+        seen.extend(t.title for t in page)
+        if cursor is None:
+            break
+    assert seen == ["e", "d", "c", "b", "a"]
+
+    # A cursor is bound to the ordering it was issued for
+    _, cursor = await async_services.get_todos_page(async_db_session, user.id, limit=2, sort="title")
+    with pytest.raises(HTTPException):
+        await async_services.get_todos_page(async_db_session, user.id, cursor=cursor, sort="created_at")
+
+    # Edited todos sort first by last modification
+    recent = await async_services.get_todos(async_db_session, user.id, sort="updated_at", direction="desc")
+    assert {t.title for t in recent[:2]} == {"a", "b"}
+
+    stats = await async_services.get_todo_stats(async_db_session, user.id)
+    assert (stats.total, stats.completed, stats.active) == (5, 2, 3)
+
+
+async def test_row_read_path_skips_the_identity_map(async_db_session: AsyncSession):
+    user = await _make_user(async_db_session)
+    todo = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Row"), user.id)
+    async_db_session.expunge_all()
+
+    rows = await async_services.get_todos(async_db_session, user.id, as_rows=True)
+    page, _ = await async_services.get_todos_page(async_db_session, user.id, as_rows=True)
+    row = await async_services.get_todo_row(async_db_session, todo.id, user.id)
+    assert [r.id for r in rows] == [r.id for r in page] == [row.id] == [todo.id]
+    assert row._fields == tuple(schemas.TodoResponse.model_fields)
+    assert schemas.TodoResponse.model_validate(row).title == "Row"
+    assert not any(isinstance(obj, models.Todo) for obj in async_db_session.identity_map.values())
+
+    with pytest.raises(HTTPException) as exc:
+        await async_services.get_todo_row(async_db_session, todo.id, user.id + 1)
+    assert exc.value.status_code == 404
@@ -0,0 +1,73 @@
+import time
+from app import services, schemas, models
+from app.auth import PrincipalCache, create_access_token, principal_cache
+
+
+def _signup(db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    token = create_access_token(data={"sub": user.username})
+    return user, {"Authorization": f"Bearer {token}"}
+
+
+def test_principal_cache_expires_and_evicts():
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    a, b, c = object(), object(), object()
+    cache.put("a", a)
+    cache.put("b", b, token_exp=time.time() - 1)
+    assert cache.get("a") is a
+    assert cache.get("b") is None  # already past the token's exp
+
+    cache.put("b", b)
+    cache.put("c", c)
+    assert cache.get("a") is None  # least recently used
+    assert cache.get("c") is c
+
+
+def test_authenticated_requests_reuse_cached_user(client, db_session):
+    user, headers = _signup(db_session)
+
+    assert client.get("/todos", headers=headers).status_code == 200
+    assert len(principal_cache) == 1
+
+    # The cached principal keeps working without the users lookup
+    db_session.execute(models.User.__table__.delete())
+    db_session.commit()
+    assert client.get("/todos", headers=headers).status_code == 200
+
+
+def test_user_update_invalidates_cached_principal(client, db_session):
+    user, headers = _signup(db_session)
+    assert client.get("/todos", headers=headers).status_code == 200
+    assert len(principal_cache) == 1
+
+    user.email = "changed@example.com"
+    db_session.commit()
+    assert len(principal_cache) == 0
+
+
+def test_request_subject_matches_authentication(monkeypatch):
+    from starlette.requests import Request
+    from app import auth
+
+    cookie_token = create_access_token(data={"sub": "from-cookie"})
+    header_token = create_access_token(data={"sub": "from-header"})
+    request = Request({"type": "http", "headers": [
+        (b"cookie", f'access_token="Bearer {cookie_token}"'.encode()),
+        (b"authorization", f"Bearer {header_token}".encode()),
+    ]})
+    decoded = []
+    original = auth.decode_token_claims
+    monkeypatch.setattr(auth, "decode_token_claims", lambda token: decoded.append(token) or original(token))
+
+    # Same precedence as get_current_user: the cookie wins over the header
+    assert auth.request_token(request) == cookie_token
+    assert auth.request_subject(request) == "from-cookie"
+    # Authentication later in the same request reuses the decoded claims
+    assert auth._request_claims(request, cookie_token)["sub"] == "from-cookie"
+    assert decoded == [cookie_token]
+
+    header_only = Request({"type": "http", "headers": [(b"authorization", f"Bearer {header_token}".encode())]})
+    assert auth.request_subject(header_only) == "from-header"
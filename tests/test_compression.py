@@ -0,0 +1,100 @@
+import gzip
+import json
+
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+
+ITEMS = [{"id": i, "title": f"Todo {i}", "description": "x" * 40} for i in range(50)]
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/list")
+    def big_list():
+        return JSONResponse(ITEMS, headers={"ETag": '"1.7"'})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        def rows():
+            for item in ITEMS:
+                yield json.dumps(item) + "\n"
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    @app.get("/png")
+    def png():
+        return Response(b"\x89PNG" * 500, media_type="image/png")
+
+    @app.get("/static/app.js")
+    def static_js():
+        return PlainTextResponse("x" * 5000)
+
+    return app
+
+
+def _get(client, path, encoding):
+    # stream=True keeps httpx from transparently decoding the body
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("encoding, decode", [
+    ("gzip", gzip.decompress),
+    ("zstd", lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body)),
+])
+def test_compresses_large_json_and_streams(encoding, decode):
+    client = TestClient(_app())
+
+    response, body = _get(client, "/list", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"1.7"'
+    assert int(response.headers["content-length"]) == len(body)
+    assert json.loads(decode(body)) == ITEMS
+
+    response, body = _get(client, "/stream", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert "content-length" not in response.headers
+    lines = decode(body).decode().splitlines()
+    assert [json.loads(line) for line in lines] == ITEMS
+
+
+def test_prefers_zstd_and_skips_what_should_not_be_compressed():
+    client = TestClient(_app())
+    assert _get(client, "/list", "gzip, zstd")[0].headers["content-encoding"] == "zstd"
+    assert _get(client, "/list", "zstd;q=0, gzip")[0].headers["content-encoding"] == "gzip"
+
+    for path, accept in (("/list", "identity"), ("/small", "gzip"), ("/png", "gzip"), ("/static/app.js", "gzip")):
+        response, body = _get(client, path, accept)
+        assert "content-encoding" not in response.headers, path
+        assert int(response.headers["content-length"]) == len(body)
+
+
+def test_todos_list_is_compressed(client, db_session):
+    client.post("/signup", data={"username": "testuser", "email": "test@example.com", "password": "testpass123"})
+    for i in range(20):
+        client.post("/todos", json={"title": f"Todo {i}", "description": "details " * 5})
+    response, body = _get(client, "/todos", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(body))) == 20
+
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+    # The 304 repeats the validator exactly as the compressed 200 sent it
+    not_modified = client.get("/todos", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert "content-encoding" not in not_modified.headers
+    identity = client.get("/todos", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert identity.status_code == 304
+    assert identity.headers["etag"] == etag.removeprefix("W/")
@@ -0,0 +1,150 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+from app import config
+from app.database import build_engine, build_async_engine, to_async_url
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./todo_app.db") == "sqlite+aiosqlite:///./todo_app.db"
+    assert to_async_url("postgresql://u:p@db/todo") == "postgresql+asyncpg://u:p@db/todo"
+    assert to_async_url("postgresql+psycopg2://u:p@db/todo") == "postgresql+asyncpg://u:p@db/todo"
+    with pytest.raises(ValueError):
+        to_async_url("oracle://db")
+
+
+def test_sqlite_engine_applies_pragmas(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == config.SQLITE_BUSY_TIMEOUT_MS
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == config.SQLITE_CACHE_SIZE
+        assert engine.pool.size() == config.DB_POOL_SIZE
+    finally:
+        engine.dispose()
+
+
+async def test_async_sqlite_engine_applies_pragmas(tmp_path):
+    engine = build_async_engine(f"sqlite:///{tmp_path / 'pragmas.db'}", poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == config.SQLITE_BUSY_TIMEOUT_MS
+    finally:
+        await engine.dispose()
+
+
+def test_ensure_search_index_backfills_existing_rows(tmp_path):
+    from sqlalchemy.orm import Session
+    from app import models
+    from app.database import Base
+    from app.search import ensure_search_index, search_todos_query
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            db.add(models.User(id=1, username="u", email="u@example.com", hashed_password="x"))
+            db.add(models.Todo(title="Buy milk", owner_id=1))
+            db.commit()
+        # Simulate a database created before search existed
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE todos_fts"))
+
+        ensure_search_index(engine)
+        ensure_search_index(engine)  # idempotent
+        with Session(engine) as db:
+            found = db.execute(search_todos_query("sqlite", 1, "milk", 10, 0)).scalars().all()
+            assert [t.title for t in found] == ["Buy milk"]
+    finally:
+        engine.dispose()
+
+
+def test_ensure_search_index_rebuilds_index_without_owner(tmp_path):
+    from sqlalchemy.orm import Session
+    from app import models
+    from app.database import Base
+    from app.search import SQLITE_FTS_DROP, ensure_search_index, search_todos_query
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            # The index as it was before owner_id was added to it
+            for statement in SQLITE_FTS_DROP:
+                conn.execute(text(statement))
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE todos_fts USING fts5(title, description, content='todos', content_rowid='id')"
+            ))
+        with Session(engine) as db:
+            db.add(models.User(id=1, username="u", email="u@example.com", hashed_password="x"))
+            db.add(models.Todo(title="Buy milk", owner_id=1))
+            db.commit()
+
+        ensure_search_index(engine)
+        with Session(engine) as db:
+            db.add(models.Todo(title="More milk", owner_id=1))
+            db.commit()
+            found = db.execute(search_todos_query("sqlite", 1, "milk", 10, 0)).scalars().all()
+            assert sorted(t.title for t in found) == ["Buy milk", "More milk"]
+    finally:
+        engine.dispose()
+
+
+def test_postgres_search_prefix_matches_like_sqlite():
+    from sqlalchemy.dialects import postgresql
+    from app.search import search_todos_query, tsquery_prefix
+
+    assert tsquery_prefix("bre milk") == "'bre':* & 'milk':*"
+    # tsquery operators and quotes are dropped rather than interpreted
+    assert tsquery_prefix("e-mail !x | 'y' (&)") == "'e':* <-> 'mail':* & 'x':* & 'y':*"
+
+    compiled = search_todos_query("postgresql", 1, "bre", 10, 0).compile(dialect=postgresql.dialect())
+    assert "to_tsquery('english'::regconfig, %(to_tsquery_1)s)" in str(compiled)
+    assert compiled.params["to_tsquery_1"] == "'bre':*"
+
+
+def test_search_falls_back_to_ilike_on_other_dialects(tmp_path):
+    from sqlalchemy.orm import Session
+    from app import models
+    from app.database import Base
+    from app.search import search_todos_query
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            for user_id in (1, 2):
+                db.add(models.User(id=user_id, username=f"u{user_id}", email=f"u{user_id}@example.com", hashed_password="x"))
+            db.add(models.Todo(title="Buy milk", description="and BREAD", owner_id=1))
+            db.add(models.Todo(title="Save 100% of it", owner_id=1))
+            db.add(models.Todo(title="Buy bread", owner_id=2))
+            db.commit()
+
+            def titles(q):
+                # Any dialect without a full-text index takes the fallback; the SQL itself is portable
+                return [t.title for t in db.execute(search_todos_query("mysql", 1, q, 10, 0)).scalars()]
+
+            assert titles("bre milk") == ["Buy milk"]
+            assert titles("100%") == ["Save 100% of it"]
+            assert titles("1%0") == []
+            assert titles("cheese") == []
+    finally:
+        engine.dispose()
+
+
+async def test_recent_writes_are_shared_between_processes(tmp_path):
+    from app.recent_writes import RecentWrites, SQLiteRecentWrites
+
+    path = str(tmp_path / "recent.db")
+    writer, reader = RecentWrites(SQLiteRecentWrites(path), window=5), RecentWrites(SQLiteRecentWrites(path), window=5)
+    assert not await reader.is_recent("alice")
+    await writer.mark("alice")
+    assert await reader.is_recent("alice")
+    assert not await reader.is_recent("bob")
+    assert not await reader.is_recent(None)
+
+    stale = RecentWrites(SQLiteRecentWrites(path), window=0)
+    assert not await stale.is_recent("alice")
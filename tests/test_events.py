@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from app import async_services, events, schemas
+from app.events import ChangeBroker, SQLiteBridge
+
+
+async def _frames(stream, count: int):
+    return [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(count)]
+
+
+async def test_publish_reaches_only_the_owners_streams():
+    broker = ChangeBroker()
+    mine, theirs = broker.subscribe(1), broker.subscribe(2)
+    broker.publish(1, {"type": "deleted", "id": 5})
+
+    assert mine.queue.get_nowait() == {"type": "deleted", "id": 5}
+    assert theirs.queue.empty()
+    broker.unsubscribe(mine)
+    broker.unsubscribe(theirs)
+    assert not broker.has_subscribers()
+
+
+async def test_slow_stream_is_told_to_resync_instead_of_blocking(monkeypatch):
+    broker = ChangeBroker(queue_size=2)
+    monkeypatch.setattr(events, "broker", broker)
+    subscription = broker.subscribe(1)
+    for todo_id in range(5):
+        broker.publish(1, {"type": "deleted", "id": todo_id})
+    assert subscription.lagging
+
+    stream = events.event_stream(subscription, heartbeat=0.05)
+    frames = await _frames(stream, 4)
+    assert frames[0] == "retry: 3000\n\n"
+    assert frames[1].startswith("event: deleted\n")
+    assert frames[3] == "event: resync\ndata: {}\n\n"
+
+    broker.publish(1, {"type": "deleted", "id": 9})
+    assert (await _frames(stream, 1))[0] == 'event: deleted\ndata: {"type": "deleted", "id": 9}\n\n'
+    assert (await _frames(stream, 1))[0] == ": ping\n\n"
+    await stream.aclose()
+    assert not broker.has_subscribers()
+
+
+async def test_mutations_publish_committed_todos(async_db_session, monkeypatch):
+    broker = ChangeBroker()
+    monkeypatch.setattr(events, "broker", broker)
+    user = await async_services.create_user(
+        async_db_session, schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    subscription = broker.subscribe(user.id)
+
+    todo = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Streamed"), user.id)
+    await async_services.update_todo(async_db_session, todo.id, schemas.TodoUpdate(completed=True), user.id)
+    await async_services.delete_todo(async_db_session, todo.id, user.id)
+
+    received = [subscription.queue.get_nowait() for _ in range(3)]
+    assert [event["type"] for event in received] == ["created", "updated", "deleted"]
+    assert received[0]["todo"]["title"] == "Streamed"
+    assert received[1]["todo"]["completed"] is True
+    assert received[2]["id"] == todo.id
+
+
+async def test_sqlite_bridge_fans_out_to_other_workers(tmp_path):
+    path = str(tmp_path / "feed.db")
+    local, remote = ChangeBroker(), ChangeBroker()
+    sender, receiver = SQLiteBridge(path, local), SQLiteBridge(path, remote)
+    subscription = remote.subscribe(7)
+    await receiver.poll_once()  # start from the current end of the table
+
+    sender.send(7, {"type": "deleted", "id": 3})
+    for _ in range(50):
+        await receiver.poll_once()
+        await sender.poll_once()
+        if not subscription.queue.empty():
+            break
+        await asyncio.sleep(0.02)
+
+    assert subscription.queue.get_nowait() == {"type": "deleted", "id": 3}
+    assert subscription.queue.empty()
+
+
+def test_events_require_authentication(client):
+    response = client.get("/todos/events")
+    assert response.status_code == 401
+
+
+def test_stream_frames_are_valid_json():
+    frame = events._sse("updated", {"type": "updated", "todo": {"id": 1}})
+    event_line, data_line, *_ = frame.split("\n")
+    assert event_line == "event: updated"
+    assert json.loads(data_line[len("data: "):]) == {"type": "updated", "todo": {"id": 1}}
+
+
+def test_publish_without_listeners_skips_the_payload(monkeypatch):
+    monkeypatch.setattr(events, "broker", ChangeBroker())
+    monkeypatch.setattr(events, "bridge", None)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("payload built with no subscribers")
+
+    monkeypatch.setattr(schemas.TodoResponse, "model_validate", fail)
+    events.publish_change("created", 1, object())
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from app.hashing import PasswordHashPool
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_hash_and_verify_off_loop():
+    pool = PasswordHashPool(max_workers=1, max_pending=4)
+    hashed_before = _sample("password_hash_seconds_count", op="hash")
+    verified_before = _sample("password_hash_seconds_count", op="verify")
+    waited_before = _sample("password_hash_queue_wait_seconds_count", op="verify")
+    try:
+        hashed = await pool.hash("secret")
+        assert await pool.verify("secret", hashed) is True
+        assert await pool.verify("nope", hashed) is False
+        assert _sample("password_hash_seconds_count", op="hash") == hashed_before + 1
+        assert _sample("password_hash_seconds_count", op="verify") == verified_before + 2
+        assert _sample("password_hash_queue_wait_seconds_count", op="verify") == waited_before + 2
+        assert _sample("password_hash_seconds_sum", op="hash") > 0
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+async def test_saturated_pool_rejects_with_503():
+    pool = PasswordHashPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+    rejected_before = _sample("password_hash_rejected_total")
+    try:
+        blocked = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc:
+            await pool.hash("secret")
+        assert exc.value.status_code == 503
+        assert _sample("password_hash_rejected_total") == rejected_before + 1
+
+        release.set()
+        assert await blocked is True
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import main
+from app.health import ReadinessChecker
+
+
+async def test_probe_records_latency_and_pool(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ok.db'}")
+    checker = ReadinessChecker(engine, interval=0.01, stale_after=60)
+    assert checker.snapshot()["status"] == "starting"
+    assert not checker.ready
+
+    assert await checker.probe_once()
+    report = checker.snapshot()
+    assert report["status"] == "ready"
+    assert report["database"]["last_probe_latency_ms"] >= 0
+    assert set(report["pool"]) == {"size", "checked_out", "overflow"}
+    await engine.dispose()
+
+
+async def test_pool_overflow_is_never_negative(tmp_path):
+    from app.database import build_async_engine
+
+    engine = build_async_engine(f"sqlite:///{tmp_path / 'pooled.db'}")
+    checker = ReadinessChecker(engine)
+    try:
+        assert engine.sync_engine.pool.overflow() < 0  # nothing opened yet
+        assert checker.snapshot()["pool"]["overflow"] == 0
+        await checker.probe_once()
+        assert checker.snapshot()["pool"]["overflow"] == 0
+    finally:
+        await engine.dispose()
+
+
+async def test_failed_and_stale_probes_are_not_ready(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+    checker = ReadinessChecker(engine, stale_after=60)
+    assert not await checker.probe_once()
+    assert checker.snapshot()["status"] == "unavailable"
+    assert "OperationalError" in checker.last_error
+
+    checker.healthy, checker.last_probe_at = True, 0.0
+    assert not checker.ready
+    await engine.dispose()
+
+
+async def test_background_checker_start_stop(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ok.db'}")
+    checker = ReadinessChecker(engine, interval=0.01, stale_after=60)
+    checker.start()
+    for _ in range(100):
+        if checker.ready:
+            break
+        await asyncio.sleep(0.01)
+    await checker.stop()
+    assert checker.ready
+    await engine.dispose()
+
+
+def test_probe_endpoints_do_not_query(client, query_budget, monkeypatch):
+    monkeypatch.setattr(main.readiness, "healthy", False)
+    monkeypatch.setattr(main.readiness, "last_probe_at", None)
+    with query_budget(0):
+        assert client.get("/livez").json() == {"status": "ok"}
+        assert client.get("/readyz").status_code == 503
+        assert client.get("/health").status_code == 503
+
+    # As left by a successful background probe
+    monkeypatch.setattr(main.readiness, "healthy", True)
+    monkeypatch.setattr(main.readiness, "last_probe_at", time.time())
+    with query_budget(0):
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert client.get("/health").json() == {"status": "healthy", "service": "todo-app"}
+
+
+def _aiosqlite_threads():
+    return {t for t in threading.enumerate() if "_connection_worker_thread" in t.name and t.is_alive()}
+
+
+def test_lifespan_shutdown_disposes_pooled_engine(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import database
+    from app.database import build_async_engine
+
+    engine = build_async_engine(f"sqlite:///{tmp_path / 'pooled.db'}")
+    monkeypatch.setattr(database, "async_engine", engine)
+    monkeypatch.setattr(main, "readiness", ReadinessChecker(engine, interval=0.01, stale_after=60))
+    before = _aiosqlite_threads()
+
+    async def use_connection():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    with TestClient(main.app) as client:
+        client.portal.call(use_connection)
+        assert engine.sync_engine.pool.checkedin() >= 1
+        assert _aiosqlite_threads() - before
+
+    assert engine.sync_engine.pool.checkedout() == 0
+    assert engine.sync_engine.pool.checkedin() == 0
+    for _ in range(100):
+        if not _aiosqlite_threads() - before:
+            break
+        time.sleep(0.01)
+    assert not _aiosqlite_threads() - before
@@ -0,0 +1,33 @@
+from app import services, schemas
+from app.auth import create_access_token
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") and all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_label_by_route_template(client, db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+    todo_id = client.post("/todos", json={"title": "A"}, headers=headers).json()["id"]
+
+    before = _sample(client.get("/metrics").text, "http_requests_total",
+                     method="GET", route="/todos/{todo_id}", status="200")
+    client.get(f"/todos/{todo_id}", headers=headers)
+    client.get("/no/such/page")
+
+    body = client.get("/metrics")
+    assert body.headers["content-type"].startswith("text/plain")
+    text = body.text
+    assert _sample(text, "http_requests_total", method="GET", route="/todos/{todo_id}", status="200") == before + 1
+    assert _sample(text, "http_requests_total", method="GET", route="<unmatched>", status="404") >= 1
+    assert f"/todos/{todo_id}\"" not in text
+    assert _sample(text, "http_request_duration_seconds_count",
+                   method="GET", route="/todos/{todo_id}", status="200") >= 1
+    assert "db_pool_checkouts_total" in text
@@ -0,0 +1,61 @@
+from app import services, schemas
+from app.auth import create_access_token
+from app.instrumentation import normalize_sql
+
+
+def _auth_headers(db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+
+
+def test_normalize_sql():
+    sql = "SELECT *\n  FROM todos WHERE id IN (?, ?, ?) AND title = 'it''s' AND owner_id = 42 LIMIT :limit"
+    assert normalize_sql(sql) == "SELECT * FROM todos WHERE id IN (...) AND title = ? AND owner_id = ? LIMIT ?"
+
+
+def test_read_routes_query_budget(client, db_session, query_budget):
+    headers = _auth_headers(db_session)
+    todo_id = client.post("/todos", json={"title": "A"}, headers=headers).json()["id"]
+
+    # Principal is cached by now: list version + todos; a single todo reads both at once
+    with query_budget(2) as seen:
+        client.get("/todos", headers=headers)
+        client.get(f"/todos/{todo_id}", headers=headers)
+        client.get("/todos/stats", headers=headers)
+    assert [(method, route, stats.count) for method, route, stats in seen] == [
+        ("GET", "/todos", 2), ("GET", "/todos/{todo_id}", 1), ("GET", "/todos/stats", 2)
+    ]
+
+    # Conditional GET answers from the version row alone
+    etag = client.get("/todos", headers=headers).headers["ETag"]
+    with query_budget(1):
+        assert client.get("/todos", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_write_routes_query_budget(client, db_session, query_budget):
+    headers = _auth_headers(db_session)
+    client.get("/todos", headers=headers)  # warm the principal cache
+
+    # One RETURNING statement for the todo plus the list-version upsert
+    with query_budget(2) as seen:
+        todo_id = client.post("/todos", json={"title": "A"}, headers=headers).json()["id"]
+        client.put(f"/todos/{todo_id}", json={"completed": True}, headers=headers)
+        client.delete(f"/todos/{todo_id}", headers=headers)
+    assert [(method, stats.count) for method, _, stats in seen] == [("POST", 2), ("PUT", 2), ("DELETE", 2)]
+
+    # A miss is the single UPDATE/DELETE matching zero rows
+    with query_budget(1):
+        assert client.put(f"/todos/{todo_id}", json={"completed": False}, headers=headers).status_code == 404
+        assert client.delete(f"/todos/{todo_id}", headers=headers).status_code == 404
+
+
+def test_slow_queries_are_logged_normalized(db_session, monkeypatch, caplog):
+    from sqlalchemy import text
+    from app import instrumentation
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    with caplog.at_level("WARNING", logger="app.sql"):
+        db_session.execute(text("SELECT 1 WHERE 'a' = 'a'"))
+    assert any("slow query" in r.message and "SELECT ? WHERE ? = ?" in r.message for r in caplog.records)
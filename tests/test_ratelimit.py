@@ -0,0 +1,95 @@
+import pytest
+from fastapi import HTTPException, Request
+
+from app import ratelimit
+from app.ratelimit import MemoryBucketBackend, SQLiteBucketBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBucketBackend()
+    return SQLiteBucketBackend(str(tmp_path / "buckets.db"))
+
+
+def test_token_bucket_burst_and_refill(backend):
+    # 1 token/s, burst of 3
+    assert [backend.take("k", 1.0, 3, 100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.take("k", 1.0, 3, 100.0) == pytest.approx(1.0)
+    assert backend.take("k", 1.0, 3, 100.5) == pytest.approx(0.5)
+    assert backend.take("k", 1.0, 3, 101.0) == 0.0
+    # Other keys have their own bucket; a long pause refills only up to the burst
+    assert backend.take("other", 1.0, 3, 101.0) == 0.0
+    assert [backend.take("k", 1.0, 3, 500.0) for _ in range(4)][-1] > 0
+
+
+def test_sqlite_buckets_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = SQLiteBucketBackend(path), SQLiteBucketBackend(path)
+    assert first.take("k", 1.0, 2, 10.0) == 0.0
+    assert second.take("k", 1.0, 2, 10.0) == 0.0
+    assert first.take("k", 1.0, 2, 10.0) > 0
+
+
+def test_login_is_rejected_before_any_query(client, db_session, monkeypatch, query_budget):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_USERNAME_BURST", 2)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_USERNAME_PER_MINUTE", 1)
+    hashed = []
+    from app import async_services
+    original = async_services.authenticate_user
+
+    async def counting_authenticate(*args, **kwargs):
+        hashed.append(args[1])
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(async_services, "authenticate_user", counting_authenticate)
+
+    for _ in range(2):
+        assert client.post("/login", data={"username": "victim", "password": "guess"}).status_code == 200
+    with query_budget(0):
+        response = client.post("/login", data={"username": " Victim ", "password": "guess"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+    assert hashed == ["victim", "victim"]
+
+    # Other usernames from the same IP still get through until the IP bucket runs dry
+    assert client.post("/login", data={"username": "someone", "password": "guess"}).status_code == 200
+
+
+def test_signup_limited_per_ip(client, db_session, monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_IP_BURST", 1)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_IP_PER_MINUTE", 1)
+    form = {"username": "a", "email": "a@example.com", "password": "testpass123"}
+    assert client.post("/signup", data=form).status_code == 303
+    assert client.post("/signup", data={**form, "username": "b"}).status_code == 429
+
+
+def _request(peer: str, forwarded=None):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded or []]
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers, "path": "/login"})
+
+
+def test_client_ip_from_trusted_proxy_hops(monkeypatch):
+    monkeypatch.setattr(ratelimit, "trusted_proxies", ratelimit._parse_networks(["10.0.0.0/8", "192.168.1.1"]))
+
+    # Direct clients cannot spoof the header
+    assert ratelimit.client_ip(_request("203.0.113.9", ["198.51.100.1"])) == "203.0.113.9"
+    # Through the ingress: the rightmost untrusted hop is the client, whatever it prepended
+    assert ratelimit.client_ip(_request("10.2.0.5", ["1.1.1.1, 198.51.100.7"])) == "198.51.100.7"
+    assert ratelimit.client_ip(_request("10.2.0.5", ["198.51.100.7, 192.168.1.1", "10.3.0.1"])) == "198.51.100.7"
+    # No header, or only trusted hops: fall back to the leftmost hop we saw
+    assert ratelimit.client_ip(_request("10.2.0.5")) == "10.2.0.5"
+    assert ratelimit.client_ip(_request("10.2.0.5", ["10.9.9.9"])) == "10.9.9.9"
+
+
+async def test_forwarded_clients_get_separate_buckets(monkeypatch):
+    monkeypatch.setattr(ratelimit, "trusted_proxies", ratelimit._parse_networks(["10.0.0.0/8"]))
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_IP_BURST", 1)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_IP_PER_MINUTE", 1)
+    monkeypatch.setattr(ratelimit, "rate_limiter", ratelimit.RateLimiter(MemoryBucketBackend()))
+
+    await ratelimit.auth_rate_limit(_request("10.2.0.5", ["198.51.100.1"]), "alice")
+    await ratelimit.auth_rate_limit(_request("10.2.0.5", ["198.51.100.2"]), "bob")
+    with pytest.raises(HTTPException) as exc:
+        await ratelimit.auth_rate_limit(_request("10.2.0.6", ["198.51.100.1"]), "carol")
+    assert exc.value.status_code == 429
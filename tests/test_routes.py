@@ -109,3 +109,347 @@ def test_logout(client):
     assert response.status_code == 303
     assert response.headers["location"] == "/"
 
+
+
+def test_todos_cursor_pagination(client, db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+    for i in range(5):
+        client.post("/todos", json={"title": f"Todo {i}"}, headers=headers)
+
+    response = client.get("/todos?limit=2", headers=headers)
+    assert [t["title"] for t in response.json()] == ["Todo 0", "Todo 1"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/todos?limit=2&cursor={cursor}", headers=headers)
+    assert [t["title"] for t in response.json()] == ["Todo 2", "Todo 3"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/todos?limit=2&cursor={cursor}", headers=headers)
+    assert [t["title"] for t in response.json()] == ["Todo 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+    # Legacy offset mode still works
+    response = client.get("/todos?skip=3&limit=10", headers=headers)
+    assert [t["title"] for t in response.json()] == ["Todo 3", "Todo 4"]
+
+    # Forged cursors with the right sort but wrongly typed values are rejected, not a 500
+    import base64
+    import json
+    for forged in (
+        ["title", "asc", {"a": 1}, 1],
+        ["title", "asc", [1], 1],
+        ["title", "asc", "Todo 1", "1"],
+        ["title", "asc", "Todo 1", [1]],
+        ["created_at", "asc", "2024-01-01T00:00:00", True],
+    ):
+        token = base64.urlsafe_b64encode(json.dumps(forged).encode()).decode().rstrip("=")
+        response = client.get(f"/todos?limit=2&sort={forged[0]}&cursor={token}", headers=headers)
+        assert response.status_code == 400, forged
+        assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_todos_batch(client, db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+
+    response = client.post(
+        "/todos/batch",
+        json={"create": [{"title": "A"}, {"title": "B"}]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    ids = [r["id"] for r in response.json()["results"]]
+
+    response = client.post(
+        "/todos/batch",
+        json={"update": [{"id": ids[0], "completed": True}], "delete": [ids[1], 999]},
+        headers=headers
+    )
+    assert [r["status"] for r in response.json()["results"]] == [200, 200, 404]
+
+    todos = client.get("/todos", headers=headers).json()
+    assert [(t["title"], t["completed"]) for t in todos] == [("A", True)]
+    assert todos[0]["updated_at"] is not None
+
+    # A null title fails only its own item; the rest of the batch still applies
+    response = client.post(
+        "/todos/batch",
+        json={"create": [{"title": "C"}], "update": [{"id": ids[0], "title": None}]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 422]
+    assert results[1]["detail"] == "title may not be null"
+    assert sorted(t["title"] for t in client.get("/todos", headers=headers).json()) == ["A", "C"]
+    c_id = results[0]["id"]
+
+    # An id named twice is ambiguous: every occurrence is rejected and the row is untouched
+    response = client.post(
+        "/todos/batch",
+        json={
+            "update": [{"id": ids[0], "title": "A2"}, {"id": c_id, "title": "C2"}, {"id": c_id, "completed": True}],
+            "delete": [ids[0]],
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["op"], r["status"]) for r in results] == [("update", 422), ("update", 422), ("update", 422), ("delete", 422)]
+    assert {r["detail"] for r in results} == {"Todo id appears more than once in the batch"}
+    todos = client.get("/todos", headers=headers).json()
+    assert sorted((t["title"], t["completed"]) for t in todos) == [("A", True), ("C", False)]
+
+
+def test_todos_batch_rolls_back_on_database_error(client, db_session, monkeypatch):
+    from app import async_services
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+    todo = client.post("/todos", json={"title": "A"}, headers=headers).json()
+
+    from sqlalchemy.exc import OperationalError
+
+    def failing_bump(dialect_name, owner_id):
+        raise OperationalError("UPDATE todo_list_versions", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(async_services, "bump_todo_list_version", failing_bump)
+    with pytest.raises(OperationalError):
+        client.post(
+            "/todos/batch",
+            json={"create": [{"title": "B"}], "delete": [todo["id"]]},
+            headers=headers
+        )
+    monkeypatch.undo()
+    assert [t["title"] for t in client.get("/todos", headers=headers).json()] == ["A"]
+
+
+def test_todos_export_import_roundtrip(client, db_session, monkeypatch):
+    import json
+    from app import async_services
+    # Small chunks so the multi-chunk paths are exercised
+    monkeypatch.setattr(async_services, "TODO_IMPORT_CHUNK_SIZE", 3)
+    monkeypatch.setattr(async_services, "TODO_EXPORT_BATCH_SIZE", 3)
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+
+    body = "\n".join(json.dumps({"title": f"Todo {i}", "completed": i % 2 == 0}) for i in range(7))
+    response = client.post("/todos/import", content=body.encode(), headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"imported": 7}
+
+    response = client.get("/todos/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in rows] == [f"Todo {i}" for i in range(7)]
+    assert rows[0]["completed"] is True and rows[1]["completed"] is False
+    assert all(r["created_at"] for r in rows)
+
+    # Re-importing an export into another account keeps the timestamps
+    client.put(f"/todos/{rows[0]['id']}", json={"title": "Todo 0 edited"}, headers=headers)
+    exported = client.get("/todos/export", headers=headers).text
+    other = services.create_user(
+        db_session, schemas.UserCreate(username="other", email="other@example.com", password="testpass123")
+    )
+    other_headers = {"Authorization": f"Bearer {create_access_token(data={'sub': other.username})}"}
+    assert client.post("/todos/import", content=exported.encode(), headers=other_headers).json() == {"imported": 7}
+    copied = [json.loads(line) for line in client.get("/todos/export", headers=other_headers).text.splitlines()]
+    original = [json.loads(line) for line in exported.splitlines()]
+    assert [(r["title"], r["created_at"], r["updated_at"]) for r in copied] == [
+        (r["title"], r["created_at"], r["updated_at"]) for r in original
+    ]
+    assert original[0]["updated_at"] is not None
+
+    # A bad line rejects the whole import
+    response = client.post("/todos/import", content=b'{"title": "ok"}\n{"nope": 1}\n', headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Line 2")
+    assert len(client.get("/todos", headers=headers).json()) == 7
+
+
+def test_todos_etag_conditional_get(client, db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+    todo_id = client.post("/todos", json={"title": "A"}, headers=headers).json()["id"]
+
+    response = client.get("/todos", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get("/todos", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    response = client.get(f"/todos/{todo_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    # The list version says nothing about whether a given todo exists
+    response = client.get(f"/todos/{todo_id + 1000}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 404
+
+    client.put(f"/todos/{todo_id}", json={"completed": True}, headers=headers)
+    response = client.get("/todos", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["completed"] is True
+
+    # After a delete, the current list ETag must not revalidate the deleted todo
+    client.delete(f"/todos/{todo_id}", headers=headers)
+    etag = client.get("/todos", headers=headers).headers["ETag"]
+    response = client.get(f"/todos/{todo_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 404
+
+
+def test_reads_use_replica_except_after_own_writes(client, db_session, monkeypatch, tmp_path):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.pool import NullPool
+    from app import database
+    from app.database import build_async_engine
+    from app.recent_writes import MemoryRecentWrites, recent_writes
+    from app.sqlite_replicator import replicate_once
+    from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+    primary_path = SQLALCHEMY_DATABASE_URL.removeprefix("sqlite:///")
+    replica_path = str(tmp_path / "replica.db")
+    replica_engine = build_async_engine(f"sqlite:///{replica_path}", poolclass=NullPool)
+    monkeypatch.setattr(
+        database, "AsyncReadSessionLocal",
+        async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+    )
+    monkeypatch.setattr(recent_writes, "backend", MemoryRecentWrites())
+
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    replicate_once(primary_path, replica_path)
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+
+    response = client.post("/todos", json={"title": "A"}, headers=headers)
+    assert response.cookies.get(database.RECENT_WRITE_COOKIE)
+    # Own write is visible right away: the recent-write cookie routes to the primary
+    assert len(client.get("/todos", headers=headers).json()) == 1
+
+    # The user's other clients, which never got the cookie, also read from the primary
+    client.cookies.clear()
+    assert len(client.get("/todos", headers=headers).json()) == 1
+
+    # Once the window has passed, the (stale) replica answers until it catches up
+    recent_writes.reset()
+    assert client.get("/todos", headers=headers).json() == []
+    replicate_once(primary_path, replica_path)
+    assert len(client.get("/todos", headers=headers).json()) == 1
+
+    # Choosing the session and authenticating share one decode of the token
+    from app import auth
+    auth.principal_cache.clear()
+    decoded = []
+    original = auth.decode_token_claims
+    monkeypatch.setattr(auth, "decode_token_claims", lambda token: decoded.append(token) or original(token))
+    assert len(client.get("/todos", headers=headers).json()) == 1
+    assert len(decoded) == 1
+
+
+def test_todos_search(client, db_session):
+    users = [
+        services.create_user(
+            db_session,
+            schemas.UserCreate(username=name, email=f"{name}@example.com", password="testpass123")
+        )
+        for name in ("alice", "bob")
+    ]
+    from app.auth import create_access_token
+    alice, bob = [
+        {"Authorization": f"Bearer {create_access_token(data={'sub': u.username})}"} for u in users
+    ]
+    milk = client.post("/todos", json={"title": "Buy milk", "description": "and bread"}, headers=alice).json()
+    client.post("/todos", json={"title": "Walk dog", "description": "milk bone treat"}, headers=alice)
+    client.post("/todos", json={"title": "Call mom"}, headers=alice)
+    client.post("/todos", json={"title": "Buy milk too"}, headers=bob)
+
+    results = client.get("/todos/search?q=milk", headers=alice).json()
+    assert [t["title"] for t in results] == ["Buy milk", "Walk dog"]  # title hit ranks first
+    assert [t["title"] for t in client.get("/todos/search?q=bre", headers=alice).json()] == ["Buy milk"]
+    assert client.get('/todos/search?q="unbalanced', headers=alice).status_code == 200
+    # Owner ids are indexed for scoping only; searching for one finds nothing
+    assert client.get(f"/todos/search?q={users[0].id}", headers=alice).json() == []
+
+    client.put(f"/todos/{milk['id']}", json={"title": "Buy eggs", "description": None}, headers=alice)
+    assert [t["title"] for t in client.get("/todos/search?q=milk", headers=alice).json()] == ["Walk dog"]
+    assert [t["title"] for t in client.get("/todos/search?q=eggs", headers=alice).json()] == ["Buy eggs"]
+
+    client.delete(f"/todos/{milk['id']}", headers=alice)
+    assert client.get("/todos/search?q=eggs", headers=alice).json() == []
+
+
+def test_todos_filtering_and_stats(client, db_session):
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+    ids = [client.post("/todos", json={"title": t}, headers=headers).json()["id"] for t in "abc"]
+    client.put(f"/todos/{ids[1]}", json={"completed": True}, headers=headers)
+
+    response = client.get("/todos?completed=false&sort=title&order=desc", headers=headers)
+    assert [t["title"] for t in response.json()] == ["c", "a"]
+    assert client.get("/todos?sort=bogus", headers=headers).status_code == 422
+    assert client.get("/todos/stats", headers=headers).json() == {"total": 3, "completed": 1, "active": 2}
+
+
+def test_todos_fast_json_matches_model_output(client, db_session, monkeypatch):
+    from app import config
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.username})}"}
+    ids = [client.post("/todos", json={"title": f"Todo {i}", "description": "d"}, headers=headers).json()["id"]
+           for i in range(3)]
+    client.put(f"/todos/{ids[0]}", json={"completed": True}, headers=headers)
+    schema = client.get("/openapi.json").json()
+
+    urls = ["/todos?limit=2", "/todos?skip=1&limit=10", "/todos?sort=updated_at&order=desc"]
+    expected = [client.get(url, headers=headers) for url in urls]
+    monkeypatch.setattr(config, "FAST_JSON_RESPONSES", True)
+    for url, before in zip(urls, expected):
+        after = client.get(url, headers=headers)
+        assert after.status_code == 200
+        assert after.content == before.content
+        assert after.headers.get("X-Next-Cursor") == before.headers.get("X-Next-Cursor")
+        assert after.headers["ETag"] == before.headers["ETag"]
+    assert client.get("/openapi.json").json() == schema
+
+
+def test_home_renders_todos_inline(client, db_session):
+    client.post("/signup", data={"username": "testuser", "email": "test@example.com", "password": "testpass123"})
+    created = client.post("/todos", json={"title": "Server <rendered>", "description": "d"}).json()
+    client.put(f"/todos/{created['id']}", json={"completed": True})
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert f'<div class="todo-item" data-id="{created["id"]}">' in response.text
+    assert "Server &lt;rendered&gt;" in response.text
+    assert 'class="todo-title completed"' in response.text
+    # The page is the initial state; app.js no longer fetches /todos on load
+    assert "loadTodos" not in client.get("/static/js/app.js").text
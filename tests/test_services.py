@@ -119,3 +119,20 @@ def test_delete_todo(db_session: Session):
     todos = services.get_todos(db_session, user.id)
     assert len(todos) == 0
 
+
+
+def test_todo_mutations_bump_list_version(db_session: Session):
+    from app.versioning import todo_list_version_query
+    user = services.create_user(
+        db_session,
+        schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+    version = lambda: db_session.execute(todo_list_version_query(user.id)).scalar()
+    assert version() is None
+
+    todo = services.create_todo(db_session, schemas.TodoCreate(title="Test Todo"), user.id)
+    assert version() == 1
+    services.update_todo(db_session, todo.id, schemas.TodoUpdate(completed=True), user.id)
+    assert version() == 2
+    services.delete_todo(db_session, todo.id, user.id)
+    assert version() == 3
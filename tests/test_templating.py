@@ -0,0 +1,49 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app import config, templating
+
+
+def _todo(**overrides):
+    fields = dict(
+        id=1, title="Milk", description=None, completed=False, owner_id=1,
+        created_at=datetime(2024, 1, 2, 3, 4, 5), updated_at=None,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_render_todo_caches_by_id_and_timestamps():
+    templating.clear_caches()
+    first = templating.render_todo(_todo())
+    assert 'data-id="1"' in first and "2024-01-02 03:04" in first
+    assert templating.render_todo(_todo()) is first
+    assert len(templating.fragment_cache) == 1
+
+    edited = templating.render_todo(_todo(completed=True, updated_at=datetime(2024, 1, 3)))
+    assert edited is not first
+    assert 'class="todo-title completed"' in edited
+    assert "&lt;b&gt;" in templating.render_todo(_todo(id=2, title="<b>"))
+
+
+def test_anonymous_pages_are_rendered_once(client):
+    templating.clear_caches()
+    assert "Login" in client.get("/login").text
+    assert "Sign Up" in client.get("/signup").text
+    assert "Welcome to Todo App" in client.get("/").text
+    assert set(templating._anonymous_pages) == {"login.html", "signup.html", "index.html"}
+
+
+def test_home_streamed_render_matches_buffered(client, db_session, monkeypatch):
+    client.post("/signup", data={"username": "testuser", "email": "test@example.com", "password": "testpass123"})
+    for i in range(3):
+        client.post("/todos", json={"title": f"Todo {i}"})
+    buffered = client.get("/")
+
+    monkeypatch.setattr(config, "TEMPLATE_STREAMING", True)
+    monkeypatch.setattr(templating, "TEMPLATE_STREAM_CHUNK_BYTES", 64)
+    streamed = client.get("/")
+    assert streamed.status_code == 200
+    assert "content-length" not in streamed.headers
+    assert streamed.headers["content-type"].startswith("text/html")
+    assert streamed.text == buffered.text
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import async_services, schemas
+from app.instrumentation import track_queries
+from app.write_queue import WriteQueue, _Op
+from tests.conftest import TestingAsyncSessionLocal
+
+
+async def _user(db: AsyncSession):
+    return await async_services.create_user(
+        db, schemas.UserCreate(username="testuser", email="test@example.com", password="testpass123")
+    )
+
+
+def test_collapse_merges_consecutive_updates_only():
+    ops = [
+        _Op("update", 1, 10, {"completed": True}),
+        _Op("create", 1, None, {"title": "x"}),
+        _Op("update", 1, 10, {"completed": False}),
+        _Op("update", 1, 11, {"title": "b"}),
+        _Op("delete", 1, 11, {}),
+        _Op("update", 1, 11, {"title": "c"}),
+    ]
+    collapsed = WriteQueue.collapse(ops)
+    assert [(op.kind, op.todo_id) for op in collapsed] == [
+        ("update", 10), ("create", None), ("update", 11), ("delete", 11), ("update", 11)
+    ]
+    assert collapsed[0].values == {"completed": False}
+
+
+async def _tracked(submit):
+    """Run one submission as its own request would: with its own query stats."""
+    with track_queries() as stats:
+        try:
+            result = await submit()
+        except HTTPException as exc:
+            result = exc
+    return result, stats
+
+
+async def test_burst_is_one_transaction_with_per_request_results(async_db_session):
+    user = await _user(async_db_session)
+    todo = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="Toggle me"), user.id)
+    version = await async_services.get_todo_list_version(async_db_session, user.id)
+    queue = WriteQueue(TestingAsyncSessionLocal, max_batch=100, max_delay_ms=50)
+
+    toggles = [schemas.TodoUpdate(completed=i % 2 == 0) for i in range(10)]
+    outcomes = await asyncio.gather(
+        _tracked(lambda: queue.create(schemas.TodoCreate(title="New"), user.id)),
+        *(_tracked(lambda update=update: queue.update(todo.id, update, user.id)) for update in toggles),
+        _tracked(lambda: queue.delete(todo.id + 1000, user.id)),
+    )
+    results = [result for result, _ in outcomes]
+    counts = [stats.count for _, stats in outcomes]
+
+    created, *updated, missing = results
+    assert created.title == "New"
+    # Ten toggles collapsed into one UPDATE; each caller sees the final state
+    assert {row.completed for row in updated} == {False}
+    assert isinstance(missing, HTTPException) and missing.status_code == 404
+    # Each request is charged its own statements: INSERT + the one version
+    # bump, the collapsed UPDATE (to the first toggle), the DELETE miss
+    assert counts == [2, 1] + [0] * 9 + [1]
+    assert await async_services.get_todo_list_version(async_db_session, user.id) == version + 1
+
+    # A later request is counted on its own, not into the request that started the writer
+    (row, later), = await asyncio.gather(
+        _tracked(lambda: queue.update(todo.id, schemas.TodoUpdate(title="Later"), user.id))
+    )
+    await queue.close()
+    assert row.title == "Later"
+    assert later.count == 2
+    assert [stats.count for _, stats in outcomes] == counts
+
+
+async def test_per_user_order_is_preserved(async_db_session):
+    user = await _user(async_db_session)
+    todo = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="a"), user.id)
+    queue = WriteQueue(TestingAsyncSessionLocal, max_delay_ms=20)
+
+    results = await asyncio.gather(
+        queue.update(todo.id, schemas.TodoUpdate(title="b"), user.id),
+        queue.delete(todo.id, user.id),
+        queue.update(todo.id, schemas.TodoUpdate(title="c"), user.id),
+        return_exceptions=True,
+    )
+    await queue.close()
+    assert results[0].title == "b"
+    assert results[1] == {"message": "Todo deleted successfully"}
+    assert isinstance(results[2], HTTPException) and results[2].status_code == 404
+
+
+async def test_failed_transaction_is_retried_per_operation(async_db_session):
+    user = await _user(async_db_session)
+    todo = await async_services.create_todo(async_db_session, schemas.TodoCreate(title="a"), user.id)
+    queue = WriteQueue(TestingAsyncSessionLocal, max_delay_ms=20)
+
+    ok, bad = await asyncio.gather(
+        queue.update(todo.id, schemas.TodoUpdate(completed=True), user.id),
+        queue.create(schemas.TodoCreate.model_construct(title=None, description=None), user.id),
+        return_exceptions=True,
+    )
+    await queue.close()
+    assert ok.completed is True
+    assert isinstance(bad, Exception) and not isinstance(bad, HTTPException)
+
+
+def test_routes_go_through_the_queue_when_enabled(client, db_session, monkeypatch, query_budget):
+    from app.write_queue import write_queue
+    monkeypatch.setattr(write_queue, "enabled", True)
+    monkeypatch.setattr(write_queue, "session_factory", TestingAsyncSessionLocal)
+    client.post("/signup", data={"username": "testuser", "email": "test@example.com", "password": "testpass123"})
+
+    client.get("/todos")  # resolve the user into the principal cache first
+    with query_budget(2) as seen:
+        todo = client.post("/todos", json={"title": "Queued"}).json()
+        assert client.put(f"/todos/{todo['id']}", json={"completed": True}).json()["completed"] is True
+        assert client.delete(f"/todos/{todo['id']}").status_code == 200
+        assert client.delete(f"/todos/{todo['id']}").status_code == 404
+    # Queued statements are reported by the request that submitted them
+    assert [stats.count for _, _, stats in seen] == [2, 2, 2, 1]
+    assert client.get("/todos").json() == []